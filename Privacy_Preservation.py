@@ -1,13 +1,31 @@
 import random
-import pandas as pd
+import heapq
 import math
 import string
-from cryptography.fernet import Fernet
+import csv
+from collections import OrderedDict, deque
+import abc
+import base64
+import contextlib
+import functools
+import gzip
+import inspect
+import io
+import itertools
+import logging
+import os
+import pickle
+import sys
+import time
+from array import array
 #toutes les bibliothèques nécessaires pour le code
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import seaborn as sns
+# Seuls la bibliothèque standard et NumPy sont chargés à l'import du module :
+# pandas (DataFrames), cryptography (Fernet), matplotlib et seaborn (graphiques)
+# sont importés à leur première utilisation.
+
+# Journalisation structurée (remplace les print ; affichée sur la console hors mode headless)
+logger = logging.getLogger(__name__)
 
 # 
 # Configuration globale du réseau routier
@@ -40,6 +58,287 @@ VITESSE_MAX_PAR_TYPE = {
     "secondaire": 50.0
 }
 
+# 
+# Table des segments (graphe routier compilé)
+# 
+class ReseauRoutier:
+    """
+    Graphe routier compilé une fois pour toutes : intersections et segments (routes orientées)
+    numérotés par des entiers. Pour chaque segment : extrémités, vecteur (dx, dy) et vecteur
+    unitaire, longueur et vitesse maximale, en tableaux NumPy (moteur "numpy") et en tuples
+    `geometrie[segment] = (dx, dy, longueur, vitesse_max)` (déplacement véhicule par véhicule).
+    Les itinéraires (listes d'intersections) sont compilés en tableaux d'identifiants de segment.
+    """
+
+    def __init__(self, intersections, routes, vitesses_max=VITESSE_MAX_PAR_TYPE):
+        # Intersections
+        self.noms = list(intersections)
+        self.indices = {nom: i for i, nom in enumerate(self.noms)}
+        self.coordonnees = [intersections[nom] for nom in self.noms]
+        self.noeuds_x = np.array([x for x, _ in self.coordonnees], dtype=float)
+        self.noeuds_y = np.array([y for _, y in self.coordonnees], dtype=float)
+
+        # Segments
+        self.routes = list(routes)
+        self.segments = {route: k for k, route in enumerate(self.routes)}
+        self.types = [routes[route]["type"] for route in self.routes]
+        self.origine = np.array([self.indices[n1] for n1, _ in self.routes], dtype=np.int64)
+        self.destination = np.array([self.indices[n2] for _, n2 in self.routes], dtype=np.int64)
+        self.dx = self.noeuds_x[self.destination] - self.noeuds_x[self.origine]
+        self.dy = self.noeuds_y[self.destination] - self.noeuds_y[self.origine]
+        norme = np.hypot(self.dx, self.dy)
+        norme[norme == 0] = 1.0
+        self.ux = self.dx / norme
+        self.uy = self.dy / norme
+        self.longueur = np.array([routes[route]["distance"] for route in self.routes], dtype=float)
+        self.vitesse_max = np.array([vitesses_max[t] for t in self.types], dtype=float)
+        self.geometrie = list(zip(self.dx.tolist(), self.dy.tolist(), self.longueur.tolist(), self.vitesse_max.tolist()))
+
+        self._itineraires = {}
+
+    def __len__(self):
+        return len(self.routes)
+
+    def compiler_itineraire(self, itineraire):
+        """Identifiants des segments successifs d'un itinéraire (tableau partagé entre les véhicules)."""
+        cle = tuple(itineraire)
+        segments = self._itineraires.get(cle)
+        if segments is None:
+            segments = array("i", (self.segments[(n1, n2)] for n1, n2 in zip(cle, cle[1:])))
+            self._itineraires[cle] = segments
+        return segments
+
+
+def lire_reseau_csv(fichier_intersections, fichier_routes, vitesses_max=VITESSE_MAX_PAR_TYPE, bidirectionnel=True):
+    """
+    Charge un graphe routier depuis deux fichiers CSV :
+    - intersections : colonnes nom, x, y
+    - routes : colonnes origine, destination, distance, type (routes rendues bidirectionnelles par défaut)
+    """
+    with open(fichier_intersections, newline="", encoding="utf-8") as f:
+        intersections = {ligne["nom"]: (float(ligne["x"]), float(ligne["y"])) for ligne in csv.DictReader(f)}
+    routes = {}
+    with open(fichier_routes, newline="", encoding="utf-8") as f:
+        for ligne in csv.DictReader(f):
+            info = {"distance": float(ligne["distance"]), "type": ligne["type"]}
+            routes[(ligne["origine"], ligne["destination"])] = info
+            if bidirectionnel:
+                routes.setdefault((ligne["destination"], ligne["origine"]), dict(info))
+    return ReseauRoutier(intersections, routes, vitesses_max)
+
+
+RESEAU = ReseauRoutier(INTERSECTIONS, ROUTES)
+
+# 
+# Calcul d'itinéraires (plus courts chemins)
+# 
+class Routeur:
+    """
+    Plus courts chemins sur un ReseauRoutier, par A* (ou Dijkstra), pondérés par la distance
+    ou par le temps de parcours (distance / vitesse maximale du type de route).
+    Les chemins origine-destination sont conservés dans un cache LRU de `taille_cache` entrées, et
+    les arbres de plus courts chemins (Dijkstra vers toutes les intersections) des origines les plus
+    utilisées dans un second cache LRU de `taille_cache_arbres` entrées : sur un grand réseau, un
+    chemin dont l'origine a déjà son arbre ne coûte que sa reconstruction.
+    Les itinéraires renvoyés sont partagés entre les véhicules et ne doivent pas être modifiés.
+    """
+    PONDERATIONS = ("distance", "temps")
+    ALGORITHMES = ("astar", "dijkstra")
+
+    def __init__(self, reseau=None, poids="distance", algorithme="astar", taille_cache=65536, taille_cache_arbres=256):
+        if poids not in self.PONDERATIONS:
+            raise ValueError(f"Pondération inconnue : {poids}")
+        if algorithme not in self.ALGORITHMES:
+            raise ValueError(f"Algorithme de routage inconnu : {algorithme}")
+        self.reseau = reseau if reseau is not None else RESEAU
+        self.poids = poids
+        self.algorithme = algorithme
+
+        # Coût de chaque segment, et listes d'adjacence (voisin, coût) par intersection
+        couts = self.reseau.longueur if poids == "distance" else self.reseau.longueur / self.reseau.vitesse_max
+        self.couts = couts.tolist()
+        self.adjacence = [[] for _ in self.reseau.noms]
+        self.segments_sortants = [[] for _ in self.reseau.noms]  # segment de chaque entrée de adjacence
+        for segment, (n1, n2) in enumerate(zip(self.reseau.origine.tolist(), self.reseau.destination.tolist())):
+            self.adjacence[n1].append((n2, self.couts[segment]))
+            self.segments_sortants[n1].append(segment)
+
+        # Heuristique A* : distance à vol d'oiseau × le plus petit rapport coût / longueur
+        # euclidienne des segments, ce qui la garde admissible et cohérente
+        norme = np.hypot(self.reseau.dx, self.reseau.dy)
+        non_nuls = norme > 0
+        self.facteur_heuristique = float(np.min(couts[non_nuls] / norme[non_nuls])) if non_nuls.any() else 0.0
+        self.noeuds_x = self.reseau.noeuds_x.tolist()
+        self.noeuds_y = self.reseau.noeuds_y.tolist()
+
+        self._chemin = functools.lru_cache(maxsize=taille_cache)(self._calculer_chemin)
+        self._arbres = OrderedDict()
+        self.taille_cache_arbres = taille_cache_arbres
+
+        # Chemins évitant les routes congestionnées, valables pour un état d'un IndexProximite
+        self._etat_alternatives = None
+        self._adjacence_congestion = None
+        self._alternatives = {}
+
+    def __getstate__(self):
+        # Le cache LRU des chemins n'est pas sérialisable : il est recréé vide à la lecture
+        etat = self.__dict__.copy()
+        etat["taille_cache"] = etat.pop("_chemin").cache_parameters()["maxsize"]
+        return etat
+
+    def __setstate__(self, etat):
+        taille_cache = etat.pop("taille_cache")
+        self.__dict__.update(etat)
+        self._chemin = functools.lru_cache(maxsize=taille_cache)(self._calculer_chemin)
+
+    def chemin(self, origine, destination):
+        """Itinéraire (liste d'intersections) le plus court de origine à destination, None si inaccessible."""
+        return self._chemin(origine, destination)
+
+    def cache_info(self):
+        return self._chemin.cache_info()
+
+    def arbre(self, origine):
+        """Prédécesseur de chaque intersection sur un plus court chemin depuis origine (-1 : aucun)."""
+        precedents = self._arbres.get(origine)
+        if precedents is None:
+            precedents = self._calculer_arbre(self.reseau.indices[origine])
+            self._arbres[origine] = precedents
+            if len(self._arbres) > self.taille_cache_arbres:
+                self._arbres.popitem(last=False)
+        else:
+            self._arbres.move_to_end(origine)
+        return precedents
+
+    def _calculer_arbre(self, depart):
+        couts = [math.inf] * len(self.adjacence)
+        precedents = array("i", [-1]) * len(self.adjacence)
+        couts[depart] = 0.0
+        tas = [(0.0, depart)]
+        while tas:
+            cout, noeud = heapq.heappop(tas)
+            if cout > couts[noeud]:
+                continue
+            for voisin, cout_segment in self.adjacence[noeud]:
+                nouveau = cout + cout_segment
+                if nouveau < couts[voisin]:
+                    couts[voisin] = nouveau
+                    precedents[voisin] = noeud
+                    heapq.heappush(tas, (nouveau, voisin))
+        return precedents
+
+    def _remonter(self, precedents, depart, arrivee):
+        noms = self.reseau.noms
+        itineraire = [noms[arrivee]]
+        noeud = arrivee
+        while noeud != depart:
+            noeud = precedents[noeud]
+            itineraire.append(noms[noeud])
+        itineraire.reverse()
+        return itineraire
+
+    def _calculer_chemin(self, origine, destination):
+        indices = self.reseau.indices
+        depart, arrivee = indices[origine], indices[destination]
+        if depart == arrivee:
+            return [origine]
+
+        # Arbre déjà calculé pour cette origine
+        arbre = self._arbres.get(origine)
+        if arbre is not None:
+            return self._remonter(arbre, depart, arrivee) if arbre[arrivee] != -1 else None
+        return self._astar(depart, arrivee, self.adjacence)
+
+    def _astar(self, depart, arrivee, adjacence):
+        if self.algorithme == "astar" and self.facteur_heuristique > 0:
+            xa, ya, facteur = self.noeuds_x[arrivee], self.noeuds_y[arrivee], self.facteur_heuristique
+            noeuds_x, noeuds_y = self.noeuds_x, self.noeuds_y
+
+            def heuristique(n):
+                return facteur * math.hypot(noeuds_x[n] - xa, noeuds_y[n] - ya)
+        else:
+            def heuristique(n):
+                return 0.0
+
+        couts = {depart: 0.0}
+        precedents = {}
+        tas = [(heuristique(depart), 0.0, depart)]
+        while tas:
+            _, cout, noeud = heapq.heappop(tas)
+            if noeud == arrivee:
+                break
+            if cout > couts[noeud]:
+                continue
+            for voisin, cout_segment in adjacence[noeud]:
+                nouveau = cout + cout_segment
+                if nouveau < couts.get(voisin, math.inf):
+                    couts[voisin] = nouveau
+                    precedents[voisin] = noeud
+                    heapq.heappush(tas, (nouveau + heuristique(voisin), nouveau, voisin))
+        else:
+            return None
+        return self._remonter(precedents, depart, arrivee)
+
+    def chemin_alternatif(self, origine, destination, proximite):
+        """
+        Plus court chemin où les segments proches d'une antenne congestionnée (IndexProximite) coûtent
+        PENALITE_CONGESTION fois plus. Les chemins sont partagés entre les véhicules et recalculés
+        seulement après un changement de l'état de congestion.
+        """
+        if self._etat_alternatives != (id(proximite), proximite.version):
+            self._etat_alternatives = (id(proximite), proximite.version)
+            self._alternatives.clear()
+            adjacence = list(self.adjacence)
+            for noeud in {int(self.reseau.origine[segment]) for segment in proximite.segments_congestionnes}:
+                adjacence[noeud] = [
+                    (voisin, cout * PENALITE_CONGESTION if segment in proximite.segments_congestionnes else cout)
+                    for (voisin, cout), segment in zip(self.adjacence[noeud], self.segments_sortants[noeud])
+                ]
+            self._adjacence_congestion = adjacence
+
+        cle = (origine, destination)
+        itineraire = self._alternatives.get(cle, False)
+        if itineraire is False:
+            indices = self.reseau.indices
+            depart, arrivee = indices[origine], indices[destination]
+            itineraire = [origine] if depart == arrivee else self._astar(depart, arrivee, self._adjacence_congestion)
+            self._alternatives[cle] = itineraire
+        return itineraire
+
+    def itineraire_aleatoire(self, rng=random, origines=None):
+        """
+        Itinéraire entre deux intersections distinctes tirées au hasard (et reliées entre elles) ;
+        l'origine est tirée dans `origines` si la liste est fournie. Lève ValueError si aucun
+        couple relié n'est trouvé en 10 x (nombre d'intersections) tirages.
+        """
+        noms = self.reseau.noms
+        if len(noms) < 2:
+            return [noms[0]]
+        origines = origines if origines is not None else noms
+        for _ in range(10 * len(noms)):
+            origine = origines[rng.randrange(len(origines))]
+            destination = noms[rng.randrange(len(noms))]
+            if origine == destination:
+                continue
+            itineraire = self.chemin(origine, destination)
+            if itineraire is not None:
+                return itineraire
+        raise ValueError(f"Aucun itinéraire trouvé en {10 * len(noms)} tirages : origines non reliées au réseau")
+
+    def itineraires_aleatoires(self, nombre, rng=random, nb_origines=None):
+        """
+        `nombre` itinéraires aléatoires. Avec nb_origines, les départs sont tirés parmi nb_origines
+        intersections (zones d'origine) choisies une fois : un seul arbre de plus courts chemins par
+        zone, ce qui rend la génération d'une grande flotte rapide même sur un grand réseau.
+        """
+        if nb_origines is None:
+            return [self.itineraire_aleatoire(rng) for _ in range(nombre)]
+        origines = rng.sample(self.reseau.noms, min(nb_origines, len(self.reseau.noms)))
+        self.taille_cache_arbres = max(self.taille_cache_arbres, len(origines))
+        for origine in origines:
+            self.arbre(origine)
+        return [self.itineraire_aleatoire(rng, origines) for _ in range(nombre)]
+
 # 
 # Configuration générale pour la simulation
 # 
@@ -61,18 +360,656 @@ SEUIL_ENERGIE_ADAPTATION = 30.0
 
 DUREE_CONGESTION = 3
 
-# Clé de chiffrement partagée
-cle_secrete = Fernet.generate_key()
-cipher = Fernet(cle_secrete)
+SEUIL_FIABILITE_V2V = 4  # Antennes acceptées sous ce seuil de fiabilité : signalées aux voisins en V2V
+SEUIL_FIABILITE_PRIVACY = 4  # Les véhicules "privacy" ne sollicitent pas les antennes sous ce seuil
+
+# Une route est congestionnée si une antenne à moins de DISTANCE_PROXIMITE_ROUTE a une congestion >= SEUIL_CONGESTION_ROUTE
+DISTANCE_PROXIMITE_ROUTE = 10.0
+SEUIL_CONGESTION_ROUTE = 3
+PENALITE_CONGESTION = 10.0  # Facteur de coût d'une route congestionnée pour la réorientation des véhicules
+
+SEPARATEUR_LOT = "\x1e"  # Séparateur des messages regroupés dans un même jeton (mode "lot")
+
+# 
+# Chiffrement des messages
+# 
+class CanalChiffre:
+    """
+    Chiffrement des messages de connexion avec la clé partagée, selon trois modes :
+    - "complet" : un jeton Fernet par message (comportement historique)
+    - "lot"     : les messages reçus par une antenne pendant une étape sont chiffrés ensemble
+                  dans un seul jeton, scellé à la fin du traitement de sa file d'attente ;
+                  intercepter l'un d'eux expose tout le lot
+    - "differe" : le message n'est mis en forme et chiffré qu'à sa première lecture (interception,
+                  Antenne.recevoir_message, export vers un puits, point de contrôle) ; un message
+                  jamais lu n'est jamais chiffré
+    Dans tous les modes, ce qui sort du véhicule (interception, antenne, puits, point de contrôle)
+    est un jeton Fernet. Le message est un texte ou le tuple des arguments de message_connexion.
+    """
+    MODES = ("complet", "lot", "differe")
+
+    def __init__(self, cle=None, mode="complet"):
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de chiffrement inconnu : {mode}")
+        self._cle = cle
+        self._cipher = None
+        self.mode = mode
+        self.lots_ouverts = {}
+
+    @property
+    def cle(self):
+        """Clé Fernet, générée à la première utilisation (même format que Fernet.generate_key())."""
+        if self._cle is None:
+            self._cle = base64.urlsafe_b64encode(os.urandom(32))
+        return self._cle
+
+    @property
+    def cipher(self):
+        if self._cipher is None:
+            from cryptography.fernet import Fernet
+            self._cipher = Fernet(self.cle)
+        return self._cipher
+
+    def chiffrer(self, antenne_id, message):
+        if self.mode == "differe":
+            return MessageDiffere(self, message)
+        if isinstance(message, tuple):
+            message = message_connexion(*message)
+        if self.mode == "complet":
+            return self.cipher.encrypt(message.encode())
+        lot = self.lots_ouverts.get(antenne_id)
+        if lot is None or lot.scelle:
+            lot = LotMessages(self)
+            self.lots_ouverts[antenne_id] = lot
+        return lot.ajouter(message)
+
+    def sceller(self, antenne_id=None):
+        """Chiffre les lots ouverts (d'une antenne ou de toutes)."""
+        ids = list(self.lots_ouverts) if antenne_id is None else [antenne_id]
+        for i in ids:
+            lot = self.lots_ouverts.pop(i, None)
+            if lot is not None:
+                lot.sceller()
+
+    def dechiffrer(self, message_chiffre):
+        if isinstance(message_chiffre, bytes):
+            return self.cipher.decrypt(message_chiffre).decode()
+        return message_chiffre.dechiffrer()
+
+
+def message_connexion(pseudonyme, priorite, resultat, distance, temps, fiabilite, congestion, cout, energie):
+    """Texte du message envoyé à l'antenne pour une tentative de connexion."""
+    return (
+        f"Pseudonyme: {pseudonyme}, Priorite: {priorite}, "
+        f"Resultat: {resultat}, Distance: {distance:.2f}, Temps: {temps:.2f}, "
+        f"Fiabilite: {fiabilite}, Congestion: {congestion}, "
+        f"Cost: {cout:.2f}, EnergieRestante: {energie:.2f}"
+    )
+
+
+def jeton_chiffre(message_chiffre):
+    """Jeton Fernet d'un message, quel que soit le mode de chiffrement (force le chiffrement différé)."""
+    if isinstance(message_chiffre, bytes):
+        return message_chiffre
+    return message_chiffre.jeton
+
+
+def nb_messages_chiffres(message_chiffre):
+    """Nombre de messages lisibles avec le jeton de message_chiffre (tout le lot en mode "lot")."""
+    if isinstance(message_chiffre, MessageLot):
+        return message_chiffre.lot.taille
+    return 1
+
+
+class MessageDiffere:
+    """
+    Message chiffré à la première lecture de son jeton (mode "differe"). Le contenu n'est ni
+    affiché (repr) ni sérialisé en clair : pickle (points de contrôle) chiffre d'abord le message.
+    """
+    __slots__ = ("canal", "_contenu", "_jeton")
+
+    def __init__(self, canal, contenu):
+        self.canal = canal
+        self._contenu = contenu
+        self._jeton = None
+
+    @property
+    def scelle(self):
+        return self._jeton is not None
+
+    def sceller(self):
+        """Met en forme et chiffre le message (une seule fois), puis oublie le contenu ; renvoie le jeton."""
+        if self._jeton is None:
+            contenu = self._contenu
+            if isinstance(contenu, tuple):
+                contenu = message_connexion(*contenu)
+            self._jeton = self.canal.cipher.encrypt(contenu.encode())
+            self._contenu = None
+        return self._jeton
+
+    def __getstate__(self):
+        return self.canal, None, self.sceller()
+
+    def __setstate__(self, etat):
+        self.canal, self._contenu, self._jeton = etat
+
+    def __repr__(self):
+        return f"MessageDiffere({'scellé' if self.scelle else 'non chiffré'})"
+
+    @property
+    def jeton(self):
+        return self.sceller()
+
+    def dechiffrer(self):
+        return self.canal.cipher.decrypt(self.jeton).decode()
+
+
+class LotMessages:
+    """Messages d'une antenne pour une étape, chiffrés ensemble dans un seul jeton (mode "lot")."""
+    __slots__ = ("canal", "messages", "taille", "_jeton")
 
-def generer_pseudonyme():
+    def __init__(self, canal):
+        self.canal = canal
+        self.messages = []
+        self.taille = 0  # conservée après le scellement
+        self._jeton = None
+
+    @property
+    def scelle(self):
+        return self._jeton is not None
+
+    def ajouter(self, message):
+        self.messages.append(message)
+        self.taille += 1
+        return MessageLot(self, self.taille - 1)
+
+    def sceller(self):
+        """Chiffre le lot en un seul jeton (une seule fois) et oublie les clairs ; renvoie le jeton."""
+        if self._jeton is None:
+            self._jeton = self.canal.cipher.encrypt(SEPARATEUR_LOT.join(self.messages).encode())
+            self.messages = None
+        return self._jeton
+
+    @property
+    def jeton(self):
+        return self.sceller()
+
+    def dechiffrer(self):
+        return self.canal.cipher.decrypt(self.jeton).decode().split(SEPARATEUR_LOT)
+
+
+class MessageLot:
+    """Référence à un message dans un LotMessages."""
+    __slots__ = ("lot", "index")
+
+    def __init__(self, lot, index):
+        self.lot = lot
+        self.index = index
+
+    @property
+    def jeton(self):
+        """Jeton du lot entier : il donne accès à tous les messages du lot."""
+        return self.lot.jeton
+
+    def dechiffrer(self):
+        return self.lot.dechiffrer()[self.index]
+
+
+# Clé de chiffrement partagée (générée à la première utilisation)
+canal = CanalChiffre()
+
+
+def __getattr__(nom):
+    # Anciens noms du module, résolus à la demande pour ne pas générer la clé à l'import
+    if nom == "cle_secrete":
+        return canal.cle
+    if nom == "cipher":
+        return canal.cipher
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+
+
+def configurer_chiffrement(mode="complet", cle=None):
+    """Remplace le canal de chiffrement global (même clé par défaut) et le renvoie."""
+    global canal
+    canal = CanalChiffre(cle=canal.cle if cle is None else cle, mode=mode)
+    return canal
+
+def generer_pseudonyme(rng=random):
     """Génère un pseudonyme aléatoire de 6 caractères."""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    return ''.join(rng.choices(string.ascii_uppercase + string.digits, k=6))
+
+# 
+# Journal des connexions (stockage en colonnes)
+# 
+class JournalConnexions:
+    """
+    Journal typé des tentatives de connexion, stocké en colonnes NumPy préallouées qui
+    grandissent par blocs. Les chaînes répétées (pseudonyme, Type_Energie, Priorite, Resultat)
+    sont remplacées par des codes catégoriels : une ligne occupe quelques dizaines d'octets
+    au lieu d'un dictionnaire de 16 clés.
+    """
+    RESULTATS = ["Acceptée", "Refusée", "Refus (energie trop faible)", "Panne", "Hors de portée"]
+    PRIORITES = ["Urgence", "Mise à jour de trafic", "Standard", "Basse_Priorite"]
+    TYPES_ENERGIE = ["Electrique", "Thermique"]
+
+    COLONNES = {
+        "Vehicule": np.int32,          # code du pseudonyme
+        "Type_Energie": np.int8,
+        "Malveillant": np.bool_,
+        "Detecte": np.bool_,
+        "SuspicionScore": np.int32,
+        "Priorite": np.int8,
+        "Exigence": np.int16,
+        "EnergieInitiale": np.float64,
+        "EnergieRestante": np.float64,
+        "Antenne_ID": np.int32,
+        "Fiabilite_Antenne": np.int16,
+        "Resultat": np.int8,
+        "Distance": np.float64,
+        "Temps": np.float64,
+        "Cout": np.float64,
+        "Message_chiffre": object,
+        "Privacy": np.bool_            # interne (statistiques), absent de df_resultats
+    }
+    COLONNES_INTERNES = ("Privacy",)
+
+    CODES_RESULTAT = {resultat: code for code, resultat in enumerate(RESULTATS)}
+    CODES_PRIORITE = {priorite: code for code, priorite in enumerate(PRIORITES)}
+    CODES_TYPE_ENERGIE = {type_energie: code for code, type_energie in enumerate(TYPES_ENERGIE)}
+
+    def __init__(self, taille_bloc=4096):
+        self.taille_bloc = taille_bloc
+        self.taille = 0
+        self.capacite = 0
+        self.colonnes = {nom: np.empty(0, dtype=dtype) for nom, dtype in self.COLONNES.items()}
+        self.pseudonymes = []
+        self.codes_pseudonymes = {}
+
+    def __len__(self):
+        return self.taille
+
+    def _agrandir(self):
+        self.capacite += self.taille_bloc
+        for nom, colonne in self.colonnes.items():
+            nouvelle = np.empty(self.capacite, dtype=colonne.dtype)
+            nouvelle[:self.taille] = colonne[:self.taille]
+            self.colonnes[nom] = nouvelle
+
+    def code_vehicule(self, pseudonyme):
+        code = self.codes_pseudonymes.get(pseudonyme)
+        if code is None:
+            code = len(self.pseudonymes)
+            self.pseudonymes.append(pseudonyme)
+            self.codes_pseudonymes[pseudonyme] = code
+        return code
+
+    def ajouter(self, vehicule, antenne_id, fiabilite, resultat, distance, temps, cout, message_chiffre):
+        """Ajoute une tentative de connexion et renvoie l'indice de sa ligne."""
+        if self.taille == self.capacite:
+            self._agrandir()
+        i = self.taille
+        c = self.colonnes
+        c["Vehicule"][i] = self.code_vehicule(vehicule.pseudonyme)
+        c["Type_Energie"][i] = self.CODES_TYPE_ENERGIE[vehicule.type_energie]
+        c["Malveillant"][i] = vehicule.is_malicious
+        c["Detecte"][i] = vehicule.est_detecte
+        c["SuspicionScore"][i] = vehicule.suspicion_score
+        c["Priorite"][i] = self.CODES_PRIORITE[vehicule.priorite]
+        c["Exigence"][i] = vehicule.exigence
+        c["EnergieInitiale"][i] = vehicule.energie_initiale
+        c["EnergieRestante"][i] = vehicule.energie
+        c["Antenne_ID"][i] = antenne_id
+        c["Fiabilite_Antenne"][i] = fiabilite
+        c["Resultat"][i] = self.CODES_RESULTAT[resultat]
+        c["Distance"][i] = distance
+        c["Temps"][i] = temps
+        c["Cout"][i] = cout
+        c["Message_chiffre"][i] = message_chiffre
+        c["Privacy"][i] = vehicule.is_privacy
+        self.taille += 1
+        return i
+
+    def colonne(self, nom, debut=0, fin=None):
+        """Vue (sans copie) sur les lignes [debut, fin) d'une colonne."""
+        return self.colonnes[nom][debut:self.taille if fin is None else fin]
+
+    def ligne(self, i):
+        """Reconstitue l'enregistrement i sous forme de dictionnaire (comme l'ancien format)."""
+        c = self.colonnes
+        return {
+            "Vehicule": self.pseudonymes[c["Vehicule"][i]],
+            "Type_Energie": self.TYPES_ENERGIE[c["Type_Energie"][i]],
+            "Malveillant": bool(c["Malveillant"][i]),
+            "Detecte": bool(c["Detecte"][i]),
+            "SuspicionScore": int(c["SuspicionScore"][i]),
+            "Priorite": self.PRIORITES[c["Priorite"][i]],
+            "Exigence": int(c["Exigence"][i]),
+            "EnergieInitiale": float(c["EnergieInitiale"][i]),
+            "EnergieRestante": float(c["EnergieRestante"][i]),
+            "Antenne_ID": int(c["Antenne_ID"][i]),
+            "Fiabilite_Antenne": int(c["Fiabilite_Antenne"][i]),
+            "Resultat": self.RESULTATS[c["Resultat"][i]],
+            "Distance": float(c["Distance"][i]),
+            "Temps": float(c["Temps"][i]),
+            "Cout": float(c["Cout"][i]),
+            "Message_chiffre": c["Message_chiffre"][i]
+        }
+
+    @property
+    def categories(self):
+        """Libellés des colonnes stockées sous forme de codes catégoriels."""
+        return {
+            "Vehicule": self.pseudonymes,
+            "Type_Energie": self.TYPES_ENERGIE,
+            "Priorite": self.PRIORITES,
+            "Resultat": self.RESULTATS
+        }
+
+    def lot(self, debut=0, fin=None):
+        """Colonnes publiques des lignes [debut, fin), en vues NumPy (à copier si elles sont conservées)."""
+        return {
+            nom: self.colonne(nom, debut, fin)
+            for nom in self.COLONNES if nom not in self.COLONNES_INTERNES
+        }
+
+    def vider(self):
+        """Oublie les lignes enregistrées (la capacité allouée et la table des pseudonymes sont conservées)."""
+        self.colonnes["Message_chiffre"][:self.taille] = None
+        self.taille = 0
+
+    def vers_dataframe(self):
+        """Construit df_resultats à partir des colonnes (vues NumPy, codes catégoriels conservés)."""
+        import pandas as pd
+        categories = self.categories
+        donnees = {}
+        for nom, colonne in self.lot().items():
+            if nom in categories:
+                colonne = pd.Categorical.from_codes(colonne, categories=categories[nom])
+            donnees[nom] = colonne
+        return pd.DataFrame(donnees, copy=False)
+
+
+class HistoriqueConnexions:
+    """
+    Historique des connexions d'un véhicule : indices de lignes dans un JournalConnexions.
+    Se comporte comme l'ancienne liste de dictionnaires (len, indexation, itération).
+    """
+
+    __slots__ = ("journal", "lignes")
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.lignes = array("q")
+
+    def append(self, ligne):
+        self.lignes.append(ligne)
+
+    def __len__(self):
+        return len(self.lignes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.journal.ligne(j) for j in self.lignes[i]]
+        return self.journal.ligne(self.lignes[i])
+
+    def __iter__(self):
+        for j in self.lignes:
+            yield self.journal.ligne(j)
+
+# 
+# Puits d'événements (diffusion des enregistrements étape par étape)
+# 
+class PuitsEvenements(abc.ABC):
+    """
+    Destination des enregistrements produits pendant une simulation. À chaque étape, run_simulation
+    envoie un lot par catégorie ("connexions", "relais", "interceptions", "positions") sous forme de
+    colonnes (tableaux NumPy ou listes de même longueur) ; les colonnes catégorielles sont des codes
+    dont les libellés sont fournis dans `categories`. Les lots reçus ne doivent pas être conservés
+    sans copie : le journal réutilise ses tableaux d'une étape à l'autre. Les sous-classes doivent
+    définir ecrire ; fermer est facultatif.
+    """
+
+    @abc.abstractmethod
+    def ecrire(self, categorie, etape, colonnes, categories=None):
+        """Reçoit le lot d'une catégorie pour l'étape `etape`."""
+
+    def fermer(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def _decoder_colonnes(colonnes, categories, jetons=True):
+    """Remplace les codes catégoriels par leurs libellés et (si jetons) les messages chiffrés par leur jeton."""
+    decodees = {}
+    for nom, colonne in colonnes.items():
+        if categories and nom in categories:
+            libelles = categories[nom]
+            decodees[nom] = [libelles[code] for code in np.asarray(colonne).tolist()]
+        elif jetons and isinstance(colonne, np.ndarray) and colonne.dtype == object:
+            decodees[nom] = [None if m is None else jeton_chiffre(m) for m in colonne]
+        else:
+            decodees[nom] = colonne
+    return decodees
+
+
+class PuitsMemoire(PuitsEvenements):
+    """Tampon circulaire en mémoire : conserve les `capacite` derniers lots de chaque catégorie."""
+
+    def __init__(self, capacite=100):
+        self.capacite = capacite
+        self.lots = {}
+
+    def ecrire(self, categorie, etape, colonnes, categories=None):
+        lot = {"Etape": np.full(len(next(iter(colonnes.values()), ())), etape, dtype=np.int64)}
+        for nom, colonne in _decoder_colonnes(colonnes, categories, jetons=False).items():
+            lot[nom] = colonne.copy() if isinstance(colonne, np.ndarray) else list(colonne)
+        self.lots.setdefault(categorie, deque(maxlen=self.capacite)).append(lot)
+
+    def vers_dataframe(self, categorie):
+        """Concatène les lots conservés d'une catégorie en un DataFrame."""
+        import pandas as pd
+        lots = self.lots.get(categorie, ())
+        return pd.concat([pd.DataFrame(lot) for lot in lots], ignore_index=True) if lots else pd.DataFrame()
+
+
+class PuitsCSV(PuitsEvenements):
+    """Un fichier CSV par catégorie dans `dossier`, complété à chaque étape."""
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        self.fichiers = {}
+        self.ecrivains = {}
+        os.makedirs(dossier, exist_ok=True)
+
+    def ecrire(self, categorie, etape, colonnes, categories=None):
+        colonnes = _decoder_colonnes(colonnes, categories)
+        if categorie not in self.ecrivains:
+            fichier = open(os.path.join(self.dossier, f"{categorie}.csv"), "w", newline="", encoding="utf-8")
+            self.fichiers[categorie] = fichier
+            self.ecrivains[categorie] = csv.writer(fichier)
+            self.ecrivains[categorie].writerow(["Etape", *colonnes])
+        valeurs = [colonne.tolist() if isinstance(colonne, np.ndarray) else colonne for colonne in colonnes.values()]
+        valeurs = [[m.decode() if isinstance(m, bytes) else m for m in colonne] for colonne in valeurs]
+        self.ecrivains[categorie].writerows((etape, *ligne) for ligne in zip(*valeurs))
+
+    def fermer(self):
+        for fichier in self.fichiers.values():
+            fichier.close()
+        self.fichiers = {}
+        self.ecrivains = {}
+
+
+class PuitsArrow(PuitsEvenements):
+    """
+    Un fichier par catégorie dans `dossier`, au format Parquet ("parquet") ou flux Arrow IPC ("ipc").
+    Les colonnes catégorielles sont écrites comme tableaux dictionnaire. Nécessite pyarrow.
+    """
+    FORMATS = {"parquet": "parquet", "ipc": "arrows"}
+
+    def __init__(self, dossier, format="parquet"):
+        if format not in self.FORMATS:
+            raise ValueError(f"Format inconnu : {format}")
+        try:
+            import pyarrow
+        except ImportError as erreur:
+            raise ImportError("PuitsArrow nécessite pyarrow (pip install pyarrow)") from erreur
+        self.pa = pyarrow
+        self.dossier = dossier
+        self.format = format
+        self.ecrivains = {}
+        os.makedirs(dossier, exist_ok=True)
+
+    def _table(self, etape, colonnes, categories):
+        pa = self.pa
+        n = len(next(iter(colonnes.values()), ()))
+        tableaux = {"Etape": pa.array(np.full(n, etape, dtype=np.int64))}
+        for nom, colonne in colonnes.items():
+            if categories and nom in categories:
+                tableaux[nom] = pa.DictionaryArray.from_arrays(
+                    pa.array(np.asarray(colonne, dtype=np.int32)), pa.array(categories[nom], type=pa.string())
+                )
+            elif isinstance(colonne, np.ndarray) and colonne.dtype == object:
+                tableaux[nom] = pa.array([None if m is None else jeton_chiffre(m) for m in colonne], type=pa.binary())
+            else:
+                tableaux[nom] = pa.array(colonne)
+        return pa.table(tableaux)
+
+    def ecrire(self, categorie, etape, colonnes, categories=None):
+        table = self._table(etape, colonnes, categories)
+        ecrivain = self.ecrivains.get(categorie)
+        if ecrivain is None:
+            chemin = os.path.join(self.dossier, f"{categorie}.{self.FORMATS[self.format]}")
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                ecrivain = pq.ParquetWriter(chemin, table.schema)
+            else:
+                ecrivain = self.pa.ipc.new_stream(chemin, table.schema)
+            self.ecrivains[categorie] = ecrivain
+        ecrivain.write_table(table)
+
+    def fermer(self):
+        for ecrivain in self.ecrivains.values():
+            ecrivain.close()
+        self.ecrivains = {}
+
+
+class ResumeDurees:
+    """
+    Durées de connexion résumées par leur nombre et leur somme : remplace la liste complète
+    (connection_durations) quand les enregistrements sont diffusés vers un puits.
+    """
+
+    def __init__(self):
+        self.nombre = 0
+        self.somme = 0.0
+
+    def extend(self, durees):
+        for duree in durees:
+            self.somme += duree
+            self.nombre += 1
+
+    def __len__(self):
+        return self.nombre
+
+    def moyenne(self):
+        return self.somme / self.nombre
+
+# 
+# Profils partagés (constantes par type d'antenne et par type d'énergie)
+# 
+class ProfilAntenne:
+    """Constantes communes à toutes les antennes d'un même type."""
+    __slots__ = ("type_antenne", "portee_base", "probabilite_panne", "duree_panne_max")
+
+    def __init__(self, type_antenne, portee_base, probabilite_panne=0.05, duree_panne_max=5):
+        self.type_antenne = type_antenne
+        self.portee_base = portee_base
+        self.probabilite_panne = probabilite_panne  # Probabilité de tomber en panne à chaque étape
+        self.duree_panne_max = duree_panne_max      # Durée maximale d'une panne
+
+
+class ProfilEnergie:
+    """Constantes communes à tous les véhicules d'un même type d'énergie."""
+    __slots__ = ("type_energie", "consommation_base", "consommation_connexion", "energie_initiale")
+
+    def __init__(self, type_energie, consommation_base, consommation_connexion, energie_initiale):
+        self.type_energie = type_energie
+        self.consommation_base = consommation_base              # par unité de distance
+        self.consommation_connexion = consommation_connexion    # par connexion aux antennes
+        self.energie_initiale = energie_initiale
+
+
+PROFILS_ANTENNE = {
+    "locale": ProfilAntenne("locale", PORTEE_CONNEXION_LOCALE),
+    "principale": ProfilAntenne("principale", PORTEE_CONNEXION_LONGUE)
+}
+
+PROFILS_ENERGIE = {
+    "Electrique": ProfilEnergie("Electrique", 0.05, 0.01, 100.0),
+    "Thermique": ProfilEnergie("Thermique", 0.1, 0.02, 80.0)
+}
+
+
+def profil_antenne(type_antenne):
+    """Profil d'un type d'antenne ; tout type autre que "locale" a la longue portée."""
+    profil = PROFILS_ANTENNE.get(type_antenne)
+    if profil is None:
+        profil = PROFILS_ANTENNE[type_antenne] = ProfilAntenne(type_antenne, PORTEE_CONNEXION_LONGUE)
+    return profil
+
+
+def profil_energie(type_energie):
+    """Profil d'un type d'énergie ; tout type autre que "Electrique" consomme comme un thermique."""
+    profil = PROFILS_ENERGIE.get(type_energie)
+    if profil is None:
+        thermique = PROFILS_ENERGIE["Thermique"]
+        profil = PROFILS_ENERGIE[type_energie] = ProfilEnergie(
+            type_energie, thermique.consommation_base, thermique.consommation_connexion, thermique.energie_initiale)
+    return profil
+
+
+class _ConteneurParesseux:
+    """
+    Attribut conteneur (liste, dictionnaire) créé au premier accès et rangé dans le slot "_<nom>" :
+    un véhicule qui ne relaie, n'intercepte ni ne reçoit rien n'alloue pas ces conteneurs.
+    """
+    __slots__ = ("fabrique", "slot")
+
+    def __init__(self, fabrique):
+        self.fabrique = fabrique
+        self.slot = None
+
+    def __set_name__(self, proprietaire, nom):
+        self.slot = "_" + nom
+
+    def __get__(self, instance, proprietaire=None):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            valeur = self.fabrique()
+            setattr(instance, self.slot, valeur)
+            return valeur
+
+    def __set__(self, instance, valeur):
+        setattr(instance, self.slot, valeur)
 
 # 
 # Classe Antenne
 # 
 class Antenne:
+    __slots__ = (
+        "id", "rng", "fiabilite", "x", "y", "profil", "portee", "disponible",
+        "congestion", "historique_congestion", "panne_duree_restante", "echeancier", "banque", "rang",
+        "connexion_queue", "ordre_arrivee", "rejets_capacite", "active_connections", "total_connections"
+    )
+
     PRIORITY_MAPPING = {
         "Urgence": 3,
         "Mise à jour de trafic": 2,
@@ -81,13 +1018,13 @@ class Antenne:
     
     MAX_CONNEXIONS = 5  # Limite maximale de connexions simultanées par antenne
 
-    def __init__(self, id, fiabilite, x, y, type_antenne="locale", disponible=True):
+    def __init__(self, id, fiabilite, x, y, type_antenne="locale", disponible=True, rng=None):
         self.id = id
+        self.rng = rng if rng is not None else random  # Générateur aléatoire (module random par défaut)
         self.fiabilite = fiabilite
         self.x = x
         self.y = y
-        self.type_antenne = type_antenne
-        self.portee_base = PORTEE_CONNEXION_LOCALE if type_antenne == "locale" else PORTEE_CONNEXION_LONGUE
+        self.profil = profil_antenne(type_antenne)  # type, portée de base, paramètres de panne
         self.portee = self.portee_base
         self.disponible = disponible
 
@@ -95,25 +1032,48 @@ class Antenne:
         self.congestion = 0
         self.historique_congestion = {}
 
-        # Gestion des défaillances
-        self.probabilite_panne = 0.05  # Probabilité de tomber en panne à chaque étape
-        self.duree_panne_max = 5       # Durée maximale d'une panne
+        # Gestion des défaillances (probabilité et durée maximale : voir le profil)
         self.panne_duree_restante = 0   # Durée restante de la panne actuelle
 
-        # File d'attente des connexions
+        # EcheancierAntennes qui planifie fins de congestion, pannes et réparations (None : pas à pas),
+        # ou BanqueAntennes qui les traite en bloc (rang : indice de l'antenne dans la banque)
+        self.echeancier = None
+        self.banque = None
+        self.rang = None
+
+        # File d'attente des connexions : tas borné à la capacité restante
+        # d'éléments (priorité, -ordre d'arrivée, véhicule)
         self.connexion_queue = []
+        self.ordre_arrivee = 0
+        self.rejets_capacite = 0  # Demandes écartées faute de capacité
 
         # Gestion des connexions actives
         self.active_connections = 0
         self.total_connections = 0  #  
 
+    @property
+    def type_antenne(self):
+        return self.profil.type_antenne
+
+    @property
+    def portee_base(self):
+        return self.profil.portee_base
+
+    @property
+    def probabilite_panne(self):
+        return self.profil.probabilite_panne
+
+    @property
+    def duree_panne_max(self):
+        return self.profil.duree_panne_max
+
     def recevoir_message(self, message_chiffre):
-        message = cipher.decrypt(message_chiffre).decode()
+        message = canal.dechiffrer(message_chiffre)
         return message
 
     def tomber_en_panne(self):
         self.disponible = False
-        self.panne_duree_restante = random.randint(1, self.duree_panne_max)
+        self.panne_duree_restante = self.rng.randint(1, self.duree_panne_max)
         # Statistique additionnelle : nombre de pannes
         self.total_connections += 0  # Placeholder si besoin
 
@@ -123,7 +1083,7 @@ class Antenne:
 
     def verifier_panne(self):
         if self.disponible:
-            if random.random() < self.probabilite_panne:
+            if self.rng.random() < self.probabilite_panne:
                 self.tomber_en_panne()
         else:
             self.panne_duree_restante -= 1
@@ -133,9 +1093,16 @@ class Antenne:
     def incrementer_congestion(self, current_step):
         self.congestion += 1
         fin_congestion = current_step + DUREE_CONGESTION
-        if fin_congestion not in self.historique_congestion:
-            self.historique_congestion[fin_congestion] = 0
-        self.historique_congestion[fin_congestion] += 1
+        if self.banque is not None:
+            self.banque.noter_connexion(self.rang, fin_congestion)
+        else:
+            if fin_congestion not in self.historique_congestion:
+                self.historique_congestion[fin_congestion] = 0
+                if self.echeancier is not None:
+                    self.echeancier.planifier(fin_congestion, EcheancierAntennes.FIN_CONGESTION, self)
+            self.historique_congestion[fin_congestion] += 1
+            if self.echeancier is not None:
+                self.echeancier.modifiees.add(self)
 
         # Réduction de la portée en fonction de la congestion
         self.portee = max(100, self.portee_base - self.congestion * 10)  # Exemple de réduction
@@ -151,13 +1118,25 @@ class Antenne:
 
     def mettre_a_jour_degradation(self):
         """Simule la dégradation de l'antenne au fil du temps."""
-        degradation = random.uniform(0, 1)  # Facteur de dégradation aléatoire
+        degradation = self.rng.uniform(0, 1)  # Facteur de dégradation aléatoire
         self.portee = max(50, self.portee - degradation)  # Réduction minimale de la portée
 
     def submit_connection_request(self, vehicule):
-        """Ajoute une demande de connexion à la file d'attente en fonction de la priorité du véhicule."""
+        """
+        Ajoute une demande de connexion à la file d'attente en fonction de la priorité du véhicule.
+        La file ne garde que les demandes qui seront servies (capacité restante) : à priorité égale
+        la plus ancienne l'emporte, et chaque demande écartée est comptée dans rejets_capacite.
+        """
         priority = self.PRIORITY_MAPPING.get(vehicule.priorite, 1)
-        self.connexion_queue.append((priority, vehicule))
+        self.ordre_arrivee += 1
+        demande = (priority, -self.ordre_arrivee, vehicule)
+        capacite = self.MAX_CONNEXIONS - self.active_connections
+        if len(self.connexion_queue) < capacite:
+            heapq.heappush(self.connexion_queue, demande)
+        else:
+            self.rejets_capacite += 1
+            if capacite > 0:
+                heapq.heappushpop(self.connexion_queue, demande)
 
     def process_connection_queue(self, current_step):
         """Traite les demandes de connexion en fonction de la priorité et de la capacité."""
@@ -167,11 +1146,11 @@ class Antenne:
         if not self.connexion_queue:
             return  # Pas de demandes à traiter
 
-        # Trier la file d'attente par priorité décroissante
-        self.connexion_queue.sort(key=lambda x: x[0], reverse=True)
+        # Priorité décroissante, puis ordre d'arrivée
+        demandes = sorted(self.connexion_queue, reverse=True)
 
         # Traiter les connexions jusqu'à la limite
-        for priority, vehicule in self.connexion_queue:
+        for priority, _, vehicule in demandes:
             if self.active_connections >= self.MAX_CONNEXIONS:
                 break  # Atteint la capacité maximale
             vehicule.process_connection_with_antenne(self, current_step)
@@ -180,12 +1159,409 @@ class Antenne:
 
         # Vider la file d'attente après traitement
         self.connexion_queue = []
+        # Mode "lot" : un seul jeton pour tous les messages de l'étape
+        canal.sceller(self.id)
+
+# 
+# Échéancier des événements des antennes
+# 
+class EcheancierAntennes:
+    """
+    Tas des événements du cycle de vie des antennes : fin de congestion, panne et réparation.
+    À chaque étape, traiter() ne touche que les antennes dont un événement est dû, au lieu de
+    vérifier panne, dégradation et congestion de chaque antenne.
+    - Panne : l'étape de panne suivant une vérification est tirée selon une loi géométrique de
+      paramètre probabilite_panne, ce qui équivaut au tirage pas à pas ; réparation après la durée
+      tirée par tomber_en_panne.
+    - Dégradation : non simulée, la portée étant de toute façon recalculée d'après la congestion
+      (mettre_a_jour_congestion) à chaque étape du mode pas à pas.
+    - panne_duree_restante n'est mise à jour qu'à la panne et à la réparation.
+    """
+    FIN_CONGESTION = 0
+    PANNE = 1
+    REPARATION = 2
+
+    def __init__(self, antennes, etape_initiale=0):
+        self.tas = []
+        self.ordre = itertools.count()
+        self.modifiees = set()  # antennes dont l'état a changé (congestion, panne, réparation) depuis extraire_modifiees()
+        for antenne in antennes:
+            antenne.echeancier = self
+            if antenne.disponible:
+                self.planifier_panne(antenne, etape_initiale)
+            else:
+                self.planifier(etape_initiale + max(1, antenne.panne_duree_restante) - 1, self.REPARATION, antenne)
+            for fin_congestion in antenne.historique_congestion:
+                self.planifier(fin_congestion, self.FIN_CONGESTION, antenne)
+
+    def __len__(self):
+        return len(self.tas)
+
+    def __getstate__(self):
+        # Le compteur ne sert qu'à départager les ex aequo : seule sa prochaine valeur est conservée
+        etat = self.__dict__.copy()
+        etat["ordre"] = next(self.ordre)
+        return etat
+
+    def __setstate__(self, etat):
+        self.__dict__.update(etat)
+        self.ordre = itertools.count(etat["ordre"])
+
+    def planifier(self, etape, type_evenement, antenne):
+        heapq.heappush(self.tas, (etape, next(self.ordre), type_evenement, antenne))
+
+    def planifier_panne(self, antenne, etape):
+        """Planifie la prochaine panne d'une antenne disponible, vérifiée à partir de `etape`."""
+        p = antenne.probabilite_panne
+        if p <= 0:
+            return
+        if p >= 1:
+            attente = 0
+        else:
+            attente = int(math.log(1.0 - antenne.rng.random()) / math.log(1.0 - p))
+        self.planifier(etape + attente, self.PANNE, antenne)
+
+    def traiter(self, etape):
+        """Applique les événements dus à `etape` ; renvoie les antennes tombées en panne à cette étape."""
+        pannes = []
+        while self.tas and self.tas[0][0] <= etape:
+            _, _, type_evenement, antenne = heapq.heappop(self.tas)
+            if type_evenement == self.FIN_CONGESTION:
+                antenne.mettre_a_jour_congestion(etape)
+                self.modifiees.add(antenne)
+            elif type_evenement == self.PANNE:
+                antenne.tomber_en_panne()
+                self.planifier(etape + antenne.panne_duree_restante, self.REPARATION, antenne)
+                self.modifiees.add(antenne)
+                pannes.append(antenne)
+            else:
+                antenne.reparer()
+                self.planifier_panne(antenne, etape + 1)
+                self.modifiees.add(antenne)
+        return pannes
+
+    def extraire_modifiees(self):
+        modifiees, self.modifiees = self.modifiees, set()
+        return modifiees
+
+# 
+# Banque d'antennes (cycle de vie vectorisé)
+# 
+class BanqueAntennes:
+    """
+    État des antennes en tableaux NumPy : pannes, réparations, dégradation et fins de congestion
+    d'une étape sont appliquées en bloc avec un numpy.random.Generator, selon le même modèle que
+    verifier_panne, mettre_a_jour_degradation et mettre_a_jour_congestion (portée plancher 50 puis 100).
+    Les connexions de l'étape sont notées par Antenne.incrementer_congestion dans un tampon circulaire
+    des fins de congestion ; seules les antennes dont l'état a changé (ou en panne) sont recopiées
+    dans les objets Antenne. historique_congestion des antennes n'est alors plus tenu.
+    """
+
+    def __init__(self, antennes, generateur=None):
+        self.antennes = list(antennes)
+        n = len(self.antennes)
+        self.generateur = generateur if generateur is not None else np.random.default_rng()
+        self.ids = [a.id for a in self.antennes]
+        self.probabilite_panne = np.array([a.probabilite_panne for a in self.antennes], dtype=float)
+        self.duree_panne_max = np.array([a.duree_panne_max for a in self.antennes], dtype=np.int64)
+        self.portee_base = np.array([a.portee_base for a in self.antennes], dtype=float)
+        self.portee = np.array([a.portee for a in self.antennes], dtype=float)
+        self.disponible = np.array([a.disponible for a in self.antennes], dtype=bool)
+        self.panne_duree_restante = np.array([a.panne_duree_restante for a in self.antennes], dtype=np.int64)
+        self.congestion = np.array([a.congestion for a in self.antennes], dtype=np.int64)
+
+        # Fins de congestion à venir : ligne (étape de fin) % (DUREE_CONGESTION + 1)
+        self.fins_congestion = np.zeros((DUREE_CONGESTION + 1, n), dtype=np.int64)
+        for rang, antenne in enumerate(self.antennes):
+            for fin_congestion, nombre in antenne.historique_congestion.items():
+                self.fins_congestion[fin_congestion % len(self.fins_congestion), rang] += nombre
+            antenne.historique_congestion = {}
+            antenne.banque = self
+            antenne.rang = rang
+
+    def noter_connexion(self, rang, fin_congestion):
+        self.congestion[rang] += 1
+        self.fins_congestion[fin_congestion % len(self.fins_congestion), rang] += 1
+
+    def mettre_a_jour(self, etape):
+        """
+        Cycle de vie de toutes les antennes pour l'étape. Renvoie le masque des antennes tombées en
+        panne à cette étape pour la durée maximale (même critère que le décompte des pannes par étape).
+        """
+        n = len(self.antennes)
+        disponibles = self.disponible.copy()
+
+        # Pannes (antennes disponibles) et réparations (antennes en panne)
+        pannes = disponibles & (self.generateur.random(n) < self.probabilite_panne)
+        self.panne_duree_restante[pannes] = self.generateur.integers(1, self.duree_panne_max[pannes] + 1)
+        self.disponible[pannes] = False
+        en_panne = ~disponibles
+        self.panne_duree_restante[en_panne] -= 1
+        reparees = en_panne & (self.panne_duree_restante <= 0)
+        self.disponible[reparees] = True
+        self.panne_duree_restante[reparees] = 0
+
+        # Dégradation
+        self.portee = np.maximum(50, self.portee - self.generateur.uniform(0, 1, n))
+
+        # Fins de congestion, puis portée d'après la congestion
+        ligne = etape % len(self.fins_congestion)
+        terminees = self.fins_congestion[ligne].copy()
+        self.fins_congestion[ligne] = 0
+        self.congestion = np.maximum(0, self.congestion - terminees)
+        self.portee = np.maximum(100, self.portee_base - self.congestion * 10)
+
+        # Recopie dans les objets des antennes modifiées
+        modifiees = np.flatnonzero(pannes | en_panne | (terminees > 0))
+        for rang, disponible, restante, congestion, portee in zip(
+            modifiees.tolist(),
+            self.disponible[modifiees].tolist(),
+            self.panne_duree_restante[modifiees].tolist(),
+            self.congestion[modifiees].tolist(),
+            self.portee[modifiees].tolist(),
+        ):
+            antenne = self.antennes[rang]
+            antenne.disponible = disponible
+            antenne.panne_duree_restante = restante
+            antenne.congestion = congestion
+            antenne.portee = portee
+        return pannes & (self.panne_duree_restante == self.duree_panne_max)
+
+# 
+# Proximité antennes / routes (routes congestionnées)
+# 
+class IndexProximite:
+    """
+    Segments du réseau situés à moins de `distance` de chaque antenne (calculés une fois, les
+    antennes étant fixes) et, pour chaque segment, nombre d'antennes congestionnées à proximité.
+    mettre_a_jour() ne reprend que les antennes dont l'état (congestion >= seuil) a changé.
+    """
+
+    def __init__(self, antennes_x, antennes_y, reseau=None, distance=DISTANCE_PROXIMITE_ROUTE,
+                 seuil=SEUIL_CONGESTION_ROUTE):
+        """antennes_x, antennes_y : positions des antennes (dans l'ordre de mettre_a_jour)."""
+        self.reseau = reseau if reseau is not None else RESEAU
+        self.seuil = seuil
+        x1 = self.reseau.noeuds_x[self.reseau.origine]
+        y1 = self.reseau.noeuds_y[self.reseau.origine]
+        dx, dy = self.reseau.dx, self.reseau.dy
+        longueur_carre = dx ** 2 + dy ** 2
+        nuls = longueur_carre == 0
+        diviseur = np.where(nuls, 1.0, longueur_carre)
+
+        # Distance point à segment, pour chaque antenne
+        self.segments_proches = []
+        for px, py in zip(np.asarray(antennes_x, dtype=float).tolist(), np.asarray(antennes_y, dtype=float).tolist()):
+            t = np.where(nuls, 0.0, np.clip(((px - x1) * dx + (py - y1) * dy) / diviseur, 0, 1))
+            proj_x = x1 + t * dx
+            proj_y = y1 + t * dy
+            ecart = np.sqrt((px - proj_x) ** 2 + (py - proj_y) ** 2)
+            self.segments_proches.append(np.flatnonzero(ecart <= distance))
+
+        self.congestionnees = np.zeros(len(self.segments_proches), dtype=bool)
+        self.nb_antennes_congestionnees = np.zeros(len(self.reseau), dtype=np.int32)
+        self.segments_congestionnes = set()
+        self.version = 0  # incrémentée à chaque changement de segments_congestionnes
+
+    def mettre_a_jour(self, antennes, rangs=None):
+        """
+        Relit la congestion des antennes (toutes, ou seulement celles des `rangs` donnés) ; renvoie
+        True si l'ensemble des segments congestionnés a changé.
+        """
+        if rangs is None:
+            return self.appliquer_congestion(
+                np.fromiter((a.congestion for a in antennes), dtype=np.int64, count=len(antennes)))
+        etat = self.congestionnees.copy()
+        for rang in rangs:
+            etat[rang] = antennes[rang].congestion >= self.seuil
+        return self._appliquer_etat(etat)
+
+    def appliquer_congestion(self, congestion):
+        """Même chose à partir d'un tableau des niveaux de congestion (ex. une étape enregistrée)."""
+        return self._appliquer_etat(np.asarray(congestion) >= self.seuil)
+
+    def _appliquer_etat(self, etat):
+        changees = np.flatnonzero(etat != self.congestionnees)
+        if not changees.size:
+            return False
+        for rang in changees.tolist():
+            self.nb_antennes_congestionnees[self.segments_proches[rang]] += 1 if etat[rang] else -1
+        self.congestionnees = etat
+        segments = set(np.flatnonzero(self.nb_antennes_congestionnees > 0).tolist())
+        if segments == self.segments_congestionnes:
+            return False
+        self.segments_congestionnes = segments
+        self.version += 1
+        return True
+
+# 
+# Index spatial des antennes (sélection des antennes candidates)
+# 
+class IndexAntennes:
+    """
+    Grille uniforme sur les positions des antennes (fixes). Un véhicule ne soumet ses demandes qu'aux
+    antennes disponibles et à portée (ou aux k plus proches d'entre elles), lues dans les cellules
+    couvertes par la plus grande portée courante. Les demandes non soumises sont comptées par antenne
+    (hors_portee, en_panne, elaguees pour les antennes à portée écartées par le mode "proches")
+    au lieu de produire un enregistrement chacune.
+    """
+    MODES = ("portee", "proches")
+
+    def __init__(self, antennes, taille_cellule=None):
+        self.antennes = list(antennes)
+        n = len(self.antennes)
+        self.x = np.array([a.x for a in self.antennes], dtype=float)
+        self.y = np.array([a.y for a in self.antennes], dtype=float)
+        self.ids = np.array([a.id for a in self.antennes], dtype=np.int32)
+        self.fiabilites = np.array([a.fiabilite for a in self.antennes], dtype=np.int16)
+        self.fiables = self.fiabilites >= SEUIL_FIABILITE_PRIVACY
+        if taille_cellule is None:
+            taille_cellule = max(ZONE_X, ZONE_Y) / max(1.0, math.sqrt(n))  # environ une antenne par cellule
+        self.taille_cellule = taille_cellule
+        cellules = {}
+        for rang, (x, y) in enumerate(zip(self.x.tolist(), self.y.tolist())):
+            cellules.setdefault((math.floor(x / taille_cellule), math.floor(y / taille_cellule)), []).append(rang)
+        self.cellules = {cle: np.array(rangs, dtype=np.int64) for cle, rangs in cellules.items()}
+        self.tous = np.arange(n)
+
+        # Compteurs agrégés (cumulés sur la simulation)
+        self.hors_portee = np.zeros(n, dtype=np.int64)
+        self.en_panne = np.zeros(n, dtype=np.int64)
+        self.elaguees = np.zeros(n, dtype=np.int64)
+        self._a_portee = np.zeros(n, dtype=np.int64)  # véhicules éligibles à portée, étape en cours
+        self._nb_vehicules = 0
+        self._nb_privacy = 0
+        self.actualiser()
+
+    def actualiser(self, rangs=None):
+        """
+        Relit la portée et la disponibilité des antennes (une fois par étape, avant les demandes) :
+        toutes, ou seulement celles des `rangs` donnés (antennes modifiées depuis l'appel précédent).
+        """
+        if rangs is None:
+            self.portee = np.fromiter((a.portee for a in self.antennes), dtype=float, count=len(self.antennes))
+            self.disponible = np.fromiter((a.disponible for a in self.antennes), dtype=bool, count=len(self.antennes))
+        else:
+            for rang in rangs:
+                antenne = self.antennes[rang]
+                self.portee[rang] = antenne.portee
+                self.disponible[rang] = antenne.disponible
+        self.rayon = float(self.portee.max()) if len(self.antennes) else 0.0
+
+    def candidates(self, x, y):
+        """Rangs des antennes des cellules qui recouvrent le disque de rayon `rayon` autour de (x, y)."""
+        r = math.ceil(self.rayon / self.taille_cellule)
+        if (2 * r + 1) ** 2 >= len(self.cellules):
+            return self.tous
+        cx, cy = math.floor(x / self.taille_cellule), math.floor(y / self.taille_cellule)
+        blocs = [self.cellules[(i, j)] for i in range(cx - r, cx + r + 1) for j in range(cy - r, cy + r + 1)
+                 if (i, j) in self.cellules]
+        return np.sort(np.concatenate(blocs)) if blocs else self.tous[:0]
+
+    def _retenir(self, x, y, rangs):
+        """Parmi `rangs`, antennes disponibles dont la portée couvre (x, y), avec leurs distances."""
+        distances = np.sqrt((self.x[rangs] - x) ** 2 + (self.y[rangs] - y) ** 2)
+        retenues = (distances <= self.portee[rangs]) & self.disponible[rangs]
+        return rangs[retenues], distances[retenues]
+
+    def a_portee(self, x, y):
+        """Rangs croissants des antennes disponibles dont la portée couvre (x, y) (relais)."""
+        rangs, _ = self._retenir(x, y, self.candidates(x, y))
+        return rangs
+
+    def selection(self, vehicule, mode="portee", k=3):
+        """Couples (rang, antenne) des antennes auxquelles le véhicule soumet ses demandes à cette étape."""
+        rangs = self.candidates(vehicule.x, vehicule.y)
+        if vehicule.is_privacy:
+            rangs = rangs[self.fiables[rangs]]
+        rangs, distances = self._retenir(vehicule.x, vehicule.y, rangs)
+        self._a_portee[rangs] += 1
+        self._nb_vehicules += 1
+        self._nb_privacy += vehicule.is_privacy
+        if mode == "proches" and len(rangs) > k:
+            # k plus proches (à distance égale, le plus petit rang) : seules les antennes à une distance
+            # au plus égale à la k-ième sont triées
+            seuil = np.partition(distances, k - 1)[k - 1]
+            proches = np.flatnonzero(distances <= seuil)
+            proches = proches[np.argsort(distances[proches], kind="stable")[:k]]
+            retenues = np.zeros(len(rangs), dtype=bool)
+            retenues[proches] = True
+            self.elaguees[rangs[~retenues]] += 1
+            rangs = rangs[retenues]
+        return [(rang, self.antennes[rang]) for rang in rangs.tolist()]
+
+    def cloturer_etape(self):
+        """Ajoute aux compteurs les demandes non soumises de l'étape : antennes en panne ou hors de portée."""
+        eligibles = self._nb_vehicules - self._nb_privacy * (~self.fiables)
+        self.en_panne += np.where(self.disponible, 0, eligibles)
+        self.hors_portee += np.where(self.disponible, eligibles - self._a_portee, 0)
+        self._a_portee[:] = 0
+        self._nb_vehicules = 0
+        self._nb_privacy = 0
+
+# 
+# Messages V2V
+# 
+class MessageV2V:
+    """
+    Message V2V structuré, partagé tel quel entre tous les destinataires d'un même envoi.
+    Le texte lisible n'est construit qu'à l'affichage (journalisation). Chaque antenne signalée
+    n'y figure qu'une fois, dans l'ordre de sa première acceptation.
+    """
+    __slots__ = ("type", "expediteur", "antennes")
+
+    ANTENNES_CONGESTIONNEES = "antennes_congestionnees"
+
+    def __init__(self, type, expediteur, antennes=()):
+        self.type = type
+        self.expediteur = expediteur
+        self.antennes = antennes  # tuple des IDs d'antennes signalées
+
+    @property
+    def cle(self):
+        """Contenu du message, indépendamment de l'expéditeur (déduplication)."""
+        return (self.type, self.antennes)
+
+    @property
+    def texte(self):
+        if self.type == MessageV2V.ANTENNES_CONGESTIONNEES:
+            return (f"Antenne(s) congestionnée(s) : {', '.join(map(str, self.antennes))}. "
+                    "Considérez l'utilisation d'une autre antenne.")
+        return self.type
+
+    def __str__(self):
+        return self.texte
+
+    def __repr__(self):
+        return f"MessageV2V({self.type!r}, {self.expediteur!r}, {self.antennes!r})"
 
 # 
 # Classe Vehicule
 # 
 class Vehicule:
-    def __init__(self, id, itineraire, vitesse=5.0, exigence=3, is_malicious=False, type_energie=None, is_privacy=False):
+    __slots__ = (
+        "id", "rng", "reseau", "itineraire", "segments", "vitesse", "is_malicious", "exigence", "is_privacy", "profil",
+        "priorite", "pseudonyme", "energie", "compteur_connexions",
+        "journal", "conserver_historique", "connexions_antennes",
+        "_connexions_relayees", "_connexions_interceptees", "_relais_effectues",
+        "dernier_message_chiffre", "_antennes_peu_fiables_acceptees", "nb_interceptions",
+        "suspicion_score", "est_detecte", "_suspected_espions",
+        "index_noeud_courant", "index_noeud_suivant", "x", "y", "segment_length", "distance_restante_segment",
+        "_received_messages", "_message_v2v", "total_connection_time"
+    )
+
+    # Conteneurs créés au premier accès
+    connexions_relayees = _ConteneurParesseux(list)
+    connexions_interceptees = _ConteneurParesseux(list)
+    relais_effectues = _ConteneurParesseux(list)  # Relais sous forme agrégée (mode relais="agrege")
+    antennes_peu_fiables_acceptees = _ConteneurParesseux(dict)  # ensemble ordonné des antennes signalées en V2V
+    suspected_espions = _ConteneurParesseux(dict)
+    received_messages = _ConteneurParesseux(list)  # Liste des messages V2V reçus
+
+    v2v_range = 50.0  # Portée de communication V2V (commune à tous les véhicules)
+
+    def __init__(self, id, itineraire, vitesse=5.0, exigence=3, is_malicious=False, type_energie=None, is_privacy=False,
+                 journal=None, rng=None, conserver_historique=True, reseau=None):
         """
         - itineraire : liste d'intersections (ex: ["A","B","C","D"])
         - vitesse    : distance que parcourt le véhicule par "pas" de simulation 
@@ -195,9 +1571,19 @@ class Vehicule:
         - is_malicious : True si c'est un véhicule espion
         - type_energie : "Electrique" ou "Thermique"
         - is_privacy   : True si le véhicule applique des politiques de confidentialité
+        - journal      : JournalConnexions partagé où sont enregistrées les connexions
+                         (un journal propre au véhicule est créé s'il n'est pas fourni)
+        - rng          : générateur aléatoire (random.Random) ; module random par défaut
+        - conserver_historique : False pour ne garder que l'état dont dépend le comportement
+                         (dernier message chiffré, antennes peu fiables acceptées, compteurs),
+                         les enregistrements étant diffusés vers un puits d'événements
+        - reseau       : ReseauRoutier des intersections de l'itinéraire (RESEAU par défaut)
         """
         self.id = id
+        self.rng = rng if rng is not None else random
+        self.reseau = reseau if reseau is not None else RESEAU
         self.itineraire = itineraire
+        self.segments = self.reseau.compiler_itineraire(itineraire)  # segment k : itineraire[k] -> itineraire[k+1]
         self.vitesse = vitesse  # vitesse "maximale" interne au véhicule
         self.is_malicious = is_malicious
         self.exigence = exigence
@@ -205,41 +1591,37 @@ class Vehicule:
 
         # Détermination du type d'énergie si non spécifié
         if type_energie is None:
-            self.type_energie = random.choices(
+            type_energie = self.rng.choices(
                 ["Electrique", "Thermique"],
                 weights=[0.5, 0.5],  
                 k=1
             )[0]
-        else:
-            self.type_energie = type_energie
-
-        # Définition des taux de consommation selon le type d'énergie
-        if self.type_energie == "Electrique":
-            self.consommation_base = 0.05  # par unité de distance
-            self.consommation_connexion = 0.01  # par connexion aux antennes
-            self.energie_initiale = 100.0
-        else:  # Thermique
-            self.consommation_base = 0.1
-            self.consommation_connexion = 0.02
-            self.energie_initiale = 80.0
+
+        # Taux de consommation et énergie initiale : profil partagé du type d'énergie
+        self.profil = profil_energie(type_energie)
 
         # Politique d'économie, priorités
-        self.priorite = random.choice(["Urgence", "Mise à jour de trafic", "Standard"])
+        self.priorite = self.rng.choice(["Urgence", "Mise à jour de trafic", "Standard"])
 
         # Pseudonyme, énergie
-        self.pseudonyme = generer_pseudonyme()
+        self.pseudonyme = generer_pseudonyme(self.rng)
         self.energie = self.energie_initiale
         self.compteur_connexions = 0
 
         # Historique de connexions
-        self.connexions_antennes = []
-        self.connexions_relayees = []
-        self.connexions_interceptees = []
+        self.journal = journal if journal is not None else JournalConnexions(taille_bloc=64)
+        self.conserver_historique = conserver_historique
+        self.connexions_antennes = HistoriqueConnexions(self.journal)
+        # (connexions_relayees, connexions_interceptees, relais_effectues : créées au premier accès)
+
+        # État minimal dont dépend le comportement (indépendant de l'historique)
+        self.dernier_message_chiffre = None      # cible de intercepter_connexion
+        self.nb_interceptions = 0
+        self._message_v2v = None                 # résumé V2V partagé (voir resume_v2v)
 
         # Détection espion
         self.suspicion_score = 0
         self.est_detecte = False
-        self.suspected_espions = {}
 
         # Itinéraire : index_noeud_courant, index_noeud_suivant
         self.index_noeud_courant = 0
@@ -247,7 +1629,7 @@ class Vehicule:
 
         # Position initiale = coord. du 1er noeud
         start_node = self.itineraire[0]
-        self.x, self.y = INTERSECTIONS[start_node]
+        self.x, self.y = self.reseau.coordonnees[self.reseau.indices[start_node]]
 
         # Distances sur le segment en cours
         self.segment_length = 0.0
@@ -256,30 +1638,36 @@ class Vehicule:
         if len(itineraire) > 1:
             self._init_segment()
 
-        # 
-        # Attributs pour Communication V2V
-        # 
-        self.v2v_range = 50.0  # Portée de communication V2V 
-        self.received_messages = []  # Liste des messages reçus
-
         # Statistiques additionnelles
         self.total_connection_time = 0.0  # Temps total passé en connexions
 
+    @property
+    def type_energie(self):
+        return self.profil.type_energie
+
+    @property
+    def consommation_base(self):
+        return self.profil.consommation_base
+
+    @property
+    def consommation_connexion(self):
+        return self.profil.consommation_connexion
+
+    @property
+    def energie_initiale(self):
+        return self.profil.energie_initiale
+
     def _init_segment(self):
-        n1 = self.itineraire[self.index_noeud_courant]
-        n2 = self.itineraire[self.index_noeud_suivant]
-        info_route = ROUTES[(n1, n2)]
-        self.segment_length = info_route["distance"]
+        dx, dy, longueur, _ = self.reseau.geometrie[self.segments[self.index_noeud_courant]]
+        self.segment_length = longueur
         self.distance_restante_segment = self.segment_length
 
         #
         if self.index_noeud_courant == 0 and self.index_noeud_suivant == 1:
-            offset = random.uniform(0, 0.3) * self.segment_length  #
+            offset = self.rng.uniform(0, 0.3) * self.segment_length  #
             ratio = offset / self.segment_length
-            x1, y1 = INTERSECTIONS[n1]
-            x2, y2 = INTERSECTIONS[n2]
-            self.x += ratio * (x2 - x1)
-            self.y += ratio * (y2 - y1)
+            self.x += ratio * dx
+            self.y += ratio * dy
             self.distance_restante_segment -= offset
 
     def deplacer(self):
@@ -288,11 +1676,7 @@ class Vehicule:
             return  # plus de segment
 
         # On détermine la vitesse maximale autorisée sur la route courante
-        n1 = self.itineraire[self.index_noeud_courant]
-        n2 = self.itineraire[self.index_noeud_suivant]
-        info_route = ROUTES[(n1, n2)]
-        type_route = info_route["type"]
-        vitesse_max_route = VITESSE_MAX_PAR_TYPE[type_route]  #
+        vitesse_max_route = self.reseau.geometrie[self.segments[self.index_noeud_courant]][3]
 
         # La "vitesse effective" est le min entre la vitesse du véhicule et la vitesse max autorisée
         distance_par_step = min(self.vitesse, vitesse_max_route)
@@ -323,13 +1707,32 @@ class Vehicule:
                     self.index_noeud_suivant = self.index_noeud_courant
                     break
 
+    def rerouter(self, proximite, routeur):
+        """
+        Si la suite de l'itinéraire (après le segment en cours) passe par une route congestionnée
+        (IndexProximite), la remplace par le chemin alternatif du routeur depuis le prochain noeud.
+        Renvoie True si l'itinéraire a changé.
+        """
+        if self.index_noeud_courant == self.index_noeud_suivant:
+            return False
+        congestionnes = proximite.segments_congestionnes
+        if not any(segment in congestionnes for segment in self.segments[self.index_noeud_suivant:]):
+            return False
+        suite = self.itineraire[self.index_noeud_suivant:]
+        alternatif = routeur.chemin_alternatif(suite[0], suite[-1], proximite)
+        if alternatif is None or alternatif == suite:
+            return False
+        # Le segment en cours devient le premier du nouvel itinéraire
+        self.itineraire = [self.itineraire[self.index_noeud_courant]] + alternatif
+        self.segments = self.reseau.compiler_itineraire(self.itineraire)
+        self.index_noeud_courant = 0
+        self.index_noeud_suivant = 1
+        return True
+
     def _move_on_segment(self, ratio):
-        n1 = self.itineraire[self.index_noeud_courant]
-        n2 = self.itineraire[self.index_noeud_suivant]
-        x1, y1 = INTERSECTIONS[n1]
-        x2, y2 = INTERSECTIONS[n2]
-        self.x += ratio * (x2 - x1)
-        self.y += ratio * (y2 - y1)
+        dx, dy, _, _ = self.reseau.geometrie[self.segments[self.index_noeud_courant]]
+        self.x += ratio * dx
+        self.y += ratio * dy
 
     def consommer_energie(self, distance, connexions):
         """
@@ -349,13 +1752,15 @@ class Vehicule:
     # 
     # Politique d'économie adaptative
     # 
-    def verifier_energie_adaptation(self):
+    def verifier_energie_adaptation(self, nb_demandes=1):
+        """Politique d'économie, appliquée une fois par demande (nb_demandes fois d'un coup)."""
         if self.energie < SEUIL_ENERGIE_ADAPTATION:
-            self.exigence = max(1, self.exigence - 1)
-            if self.priorite == "Standard":
-                self.priorite = "Basse_Priorite"
-            elif self.priorite == "Mise à jour de trafic":
-                self.priorite = "Standard"
+            self.exigence = max(1, self.exigence - nb_demandes)
+            for _ in range(min(nb_demandes, 2)):  # au plus deux paliers de priorité
+                if self.priorite == "Standard":
+                    self.priorite = "Basse_Priorite"
+                elif self.priorite == "Mise à jour de trafic":
+                    self.priorite = "Standard"
 
     def refuser_si_energie_faible(self):
         return self.energie < SEUIL_ENERGIE_REFUS
@@ -375,7 +1780,7 @@ class Vehicule:
         return False
 
     def envoyer_message_chiffre(self, antenne_id, message):
-        message_chiffre = cipher.encrypt(message.encode())
+        message_chiffre = canal.chiffrer(antenne_id, message)
         return (antenne_id, message_chiffre)
 
     def essayer_connexion_antenne(self, antenne, current_step):
@@ -384,8 +1789,7 @@ class Vehicule:
         
         if self.is_privacy:
             #refuser les antennes avec fiabilité < seuil
-            seuil_privacy = 4  #seuil de fiabilité
-            if antenne.fiabilite < seuil_privacy:
+            if antenne.fiabilite < SEUIL_FIABILITE_PRIVACY:
                 # Ne pas tenter de connexion
                 return
         antenne.submit_connection_request(self)
@@ -427,32 +1831,36 @@ class Vehicule:
                 self.consommer_energie(0, connexions=1)
                 self.total_connection_time += temps_connexion  #
 
-        message = (
-            f"Pseudonyme: {self.pseudonyme}, Priorite: {self.priorite}, "
-            f"Resultat: {resultat}, Distance: {dist:.2f}, Temps: {temps_connexion:.2f}, "
-            f"Fiabilite: {antenne.fiabilite}, Congestion: {antenne.congestion}, "
-            f"Cost: {cout_connexion:.2f}, EnergieRestante: {self.energie:.2f}"
-        )
+        # Arguments de message_connexion : le texte n'est construit qu'au chiffrement
+        message = (self.pseudonyme, self.priorite, resultat, dist, temps_connexion,
+                   antenne.fiabilite, antenne.congestion, cout_connexion, self.energie)
         antenne_id, message_chiffre = self.envoyer_message_chiffre(antenne.id, message)
 
-        self.connexions_antennes.append({
-            "Vehicule": self.pseudonyme,
-            "Type_Energie": self.type_energie,
-            "Malveillant": self.is_malicious,
-            "Detecte": self.est_detecte,
-            "SuspicionScore": self.suspicion_score,
-            "Priorite": self.priorite,
-            "Exigence": self.exigence,
-            "EnergieInitiale": self.energie_initiale,
-            "EnergieRestante": self.energie,  #
-            "Antenne_ID": antenne_id,
-            "Fiabilite_Antenne": antenne.fiabilite,
-            "Resultat": resultat,
-            "Distance": dist,  # 
-            "Temps": temps_connexion,        # 
-            "Cout": cout_connexion,           # 
-            "Message_chiffre": message_chiffre  # Ajout de la clé manquante
-        })
+        ligne = self.journal.ajouter(
+            self, antenne_id, antenne.fiabilite, resultat,
+            dist, temps_connexion, cout_connexion, message_chiffre
+        )
+        self.dernier_message_chiffre = message_chiffre
+        if resultat == "Acceptée" and antenne.fiabilite < SEUIL_FIABILITE_V2V:
+            if antenne_id not in self.antennes_peu_fiables_acceptees:
+                self.antennes_peu_fiables_acceptees[antenne_id] = None
+                self._message_v2v = None  # résumé V2V à reconstruire
+        if self.conserver_historique:
+            self.connexions_antennes.append(ligne)
+
+    def soumettre_demandes(self, demandes, nb_antennes):
+        """
+        Soumet une demande à chacune des antennes déjà sélectionnées : couples (rang, antenne) de
+        IndexAntennes.selection, qui applique aussi le filtre de confidentialité. Comme avec
+        essayer_connexion_antenne, la politique d'économie est appliquée une fois par antenne des
+        nb_antennes de la liste complète, avant chaque demande soumise.
+        """
+        appliquees = 0
+        for rang, antenne in demandes:
+            self.verifier_energie_adaptation(rang + 1 - appliquees)
+            appliquees = rang + 1
+            antenne.submit_connection_request(self)
+        self.verifier_energie_adaptation(nb_antennes - appliquees)
 
     def relayer_connexion(self, autre_vehicule, antenne):
         if (self.distance(antenne) <= antenne.portee
@@ -466,25 +1874,87 @@ class Vehicule:
             # Consommation énergétique due au relais
             self.consommer_energie(0, connexions=1)
 
+    def antennes_relais(self, antennes, index=None):
+        """
+        Antennes à portée et disponibles que le véhicule peut relayer pendant l'étape (distance calculée une fois),
+        lues dans les cellules voisines de l'index d'antennes s'il est fourni.
+        """
+        if self.est_detecte:
+            return []
+        if index is not None:
+            return [index.antennes[rang] for rang in self.rangs_relais(index).tolist()]
+        return [antenne for antenne in antennes if antenne.disponible and self.distance(antenne) <= antenne.portee]
+
+    def rangs_relais(self, index):
+        """Rangs dans `index` (IndexAntennes) des antennes que le véhicule peut relayer pendant l'étape."""
+        if self.est_detecte:
+            return index.tous[:0]
+        return index.a_portee(self.x, self.y)
+
+    def relayer_connexions(self, vehicules, antennes_relais):
+        """
+        Relais en bloc : équivalent à appeler relayer_connexion(autre, antenne) pour chaque
+        autre véhicule de `vehicules` (qui contient le relais) et chaque antenne. Les enregistrements ne sont
+        copiés que chez les véhicules qui conservent leur historique ; l'énergie des relais est déduite
+        en une fois et bornée à l'énergie restante (aux arrondis près des déductions unitaires).
+        """
+        if not antennes_relais:
+            return
+        if self.conserver_historique:  # réglage commun à toute la flotte dans run_simulation
+            enregistrements = [{
+                "Antenne_ID": antenne.id,
+                "Relais_Vehicule": self.pseudonyme,
+                "Fiabilite_Antenne": antenne.fiabilite
+            } for antenne in antennes_relais]
+            for autre_vehicule in vehicules:
+                if autre_vehicule is not self and autre_vehicule.conserver_historique:
+                    autre_vehicule.connexions_relayees.extend(enregistrements)
+        nb_relais = (len(vehicules) - 1) * len(antennes_relais)
+        self.consommer_energie(0, connexions=nb_relais)
+
+    def relayer_connexions_agregees(self, nb_destinataires, antennes_relais, current_step):
+        """
+        Forme agrégée des relais : un seul enregistrement par antenne relayée, conservé par le
+        véhicule relais dans relais_effectues, au lieu d'une copie chez chaque destinataire.
+        L'énergie est déduite en une fois (aux arrondis près par rapport aux déductions unitaires).
+        """
+        if not antennes_relais or nb_destinataires <= 0:
+            return
+        if self.conserver_historique:
+            for antenne in antennes_relais:
+                self.relais_effectues.append({
+                    "Etape": current_step,
+                    "Antenne_ID": antenne.id,
+                    "Relais_Vehicule": self.pseudonyme,
+                    "Fiabilite_Antenne": antenne.fiabilite,
+                    "Nb_Destinataires": nb_destinataires
+                })
+        self.consommer_energie(0, connexions=nb_destinataires * len(antennes_relais))
+
     # 
     # Espionnage
     # 
     def intercepter_connexion(self, vehicule_cible):
+        """
+        Intercepte le dernier message chiffré de la cible ; renvoie l'interception (ou None).
+        En mode "lot", le jeton intercepté est celui du lot : tous ses messages comptent comme interceptés.
+        """
         if not self.is_malicious or self.est_detecte:
-            return
-        if vehicule_cible.connexions_antennes:
-            derniere_connexion = vehicule_cible.connexions_antennes[-1]
-            try:
-                msg_chiffre = derniere_connexion["Message_chiffre"]
-                self.connexions_interceptees.append({
-                    "Victime": vehicule_cible.pseudonyme,
-                    "Message_chiffre": msg_chiffre
-                })
-                self.suspicion_score += 1
-                if self.suspicion_score >= SEUIL_SUSPICION:
-                    self.est_detecte = True
-            except KeyError:
-                print(f"Alerte: 'Message_chiffre' manquant dans les connexions de {vehicule_cible.pseudonyme}")
+            return None
+        if vehicule_cible.dernier_message_chiffre is None:
+            return None
+        interception = {
+            "Victime": vehicule_cible.pseudonyme,
+            "Message_chiffre": jeton_chiffre(vehicule_cible.dernier_message_chiffre),
+            "Messages_exposes": nb_messages_chiffres(vehicule_cible.dernier_message_chiffre)
+        }
+        self.nb_interceptions += interception["Messages_exposes"]
+        if self.conserver_historique:
+            self.connexions_interceptees.append(interception)
+        self.suspicion_score += 1
+        if self.suspicion_score >= SEUIL_SUSPICION:
+            self.est_detecte = True
+        return interception
 
     def suspecter_espion(self, espion_pseudonyme):
         if espion_pseudonyme not in self.suspected_espions:
@@ -494,8 +1964,14 @@ class Vehicule:
     # 
     # Communication V2V
     # 
-    def detect_nearby_vehicles(self, vehicules):
-        """Détecte les véhicules à proximité dans la portée V2V."""
+    def detect_nearby_vehicles(self, vehicules, index=None):
+        """
+        Détecte les véhicules à proximité dans la portée V2V.
+        Si un index spatial (GrilleVoisinage) est fourni, seules les cellules voisines sont
+        examinées ; sinon toute la liste est parcourue (utile pour contre-vérifier l'index).
+        """
+        if index is not None:
+            return index.voisins(self)
         nearby = []
         for veh in vehicules:
             if veh.id != self.id:
@@ -504,50 +1980,930 @@ class Vehicule:
                     nearby.append(veh)
         return nearby
 
-    def send_v2v_messages(self, vehicules):
+    def send_v2v_messages(self, vehicules, index=None):
         """
         Envoie des messages V2V aux véhicules à proximité.
         Les messages peuvent inclure des informations sur les antennes ou les routes.
         """
-        nearby_vehicles = self.detect_nearby_vehicles(vehicules)
-        for veh in nearby_vehicles:
-            # partage des antennes congestionnées
-            congested_antennes = [c["Antenne_ID"] for c in self.connexions_antennes if c["Resultat"] == "Acceptée" and c["Fiabilite_Antenne"] < 4]
-            if congested_antennes:
-                # Conversion des IDs en chaînes de caractères pour éviter l'erreur
-                message = f"Antenne(s) congestionnée(s) : {', '.join(map(str, congested_antennes))}. Considérez l'utilisation d'une autre antenne."
-                veh.receive_v2v_message(self.pseudonyme, message)
+        message = self.resume_v2v()
+        if message is None:
+            return
+        for veh in self.detect_nearby_vehicles(vehicules, index=index):
+            veh.receive_v2v_message(self.pseudonyme, message)
+
+    def resume_v2v(self):
+        """
+        Résumé des antennes congestionnées (acceptées avec une fiabilité < SEUIL_FIABILITE_V2V),
+        construit une seule fois puis partagé par tous les destinataires ; il n'est
+        reconstruit que lorsqu'une nouvelle antenne est signalée. None si rien à signaler.
+        Le résumé est dédoublonné : le texte d'origine répétait une antenne à chaque connexion
+        acceptée, il ne la cite plus qu'une fois (ordre de première acceptation). Le type du
+        message, donc l'ajustement de priorité du destinataire, est inchangé.
+        """
+        if self._message_v2v is None and self.antennes_peu_fiables_acceptees:
+            self._message_v2v = MessageV2V(MessageV2V.ANTENNES_CONGESTIONNEES, self.pseudonyme,
+                                           tuple(self.antennes_peu_fiables_acceptees))
+        return self._message_v2v
 
     def receive_v2v_message(self, sender_pseudonyme, message):
-        """Reçoit un message V2V et le stocke."""
-        self.received_messages.append({
-            "Sender": sender_pseudonyme,
-            "Message": message
-        })
+        """Reçoit un message V2V (MessageV2V) et le stocke."""
+        self.received_messages.append(message)
 
     def process_received_messages(self):
         """Traite les messages V2V reçus."""
         for msg in self.received_messages:
             #
             # 
-            print(f"{self.pseudonyme} a reçu un message de {msg['Sender']}: {msg['Message']}")
+            logger.info("%s a reçu un message de %s: %s", self.pseudonyme, msg.expediteur, msg,
+                        extra={"vehicule": self.pseudonyme, "expediteur": msg.expediteur})
             #ajuster la priorité si une antenne est congestionnée
-            if "Antenne(s) congestionnée(s)" in msg['Message']:
+            if msg.type == MessageV2V.ANTENNES_CONGESTIONNEES:
                 #on ajuste la priorité vers "Standard"
                 if self.priorite != "Standard":
-                    print(f"{self.pseudonyme} ajuste sa priorité de {self.priorite} à Standard suite au message V2V.")
+                    logger.info("%s ajuste sa priorité de %s à Standard suite au message V2V.", self.pseudonyme, self.priorite,
+                                extra={"vehicule": self.pseudonyme})
                     self.priorite = "Standard"
         # Vider les messages après traitement
-        self.received_messages = []
+        self.received_messages.clear()
+
+# 
+# Index spatial pour la communication V2V
+# 
+class GrilleVoisinage:
+    """
+    Grille uniforme des positions des véhicules, reconstruite une fois par étape.
+    La taille des cellules vaut la plus grande portée V2V : un véhicule ne peut avoir
+    de voisins que dans les cellules adjacentes à la sienne, ce qui ramène la découverte
+    des voisins de toute la flotte à environ O(V + k) au lieu de O(V²).
+    """
+
+    def __init__(self, vehicules, taille_cellule=None):
+        if taille_cellule is None:
+            taille_cellule = max((v.v2v_range for v in vehicules), default=1.0)
+        self.taille_cellule = taille_cellule
+        self.cellules = {}
+        for rang, v in enumerate(vehicules):
+            self.cellules.setdefault(self._cellule(v.x, v.y), []).append((rang, v))
+
+    def _cellule(self, x, y):
+        return (math.floor(x / self.taille_cellule), math.floor(y / self.taille_cellule))
+
+    def voisins(self, vehicule):
+        """Véhicules à portée V2V, dans le même ordre que le parcours de la liste complète."""
+        cx, cy = self._cellule(vehicule.x, vehicule.y)
+        rayon = max(1, math.ceil(vehicule.v2v_range / self.taille_cellule))
+        nearby = []
+        for i in range(cx - rayon, cx + rayon + 1):
+            for j in range(cy - rayon, cy + rayon + 1):
+                for rang, veh in self.cellules.get((i, j), ()):
+                    if veh.id != vehicule.id and vehicule.distance(veh) <= vehicule.v2v_range:
+                        nearby.append((rang, veh))
+        nearby.sort(key=lambda item: item[0])
+        return [veh for _, veh in nearby]
+
+# 
+# Bus de diffusion V2V (domaines de diffusion par cellule)
+# 
+class BusV2V:
+    """
+    Diffusion des messages V2V par domaine plutôt que destinataire par destinataire.
+    Un message publié dans une cellule de la grille (taille : portée V2V) atteint tous les véhicules
+    des cellules situées à moins de `rayon` cellules, approximation par excès de la portée V2V.
+    - les contenus identiques (MessageV2V.cle) publiés dans un même domaine ne sont livrés qu'une fois ;
+    - chaque véhicule garde les contenus déjà reçus dans un ensemble LRU borné (taille_vus) : il ne les
+      traite ni ne les relaie à nouveau tant qu'ils n'en sont pas sortis ; avec renouveler=True, un
+      contenu est de nouveau livré à l'étape suivante (comme l'envoi direct, qui rappelle la congestion
+      à chaque étape), sinon il ne l'est qu'une fois ;
+    - un message reçu avec un ttl > 1 est republié dans la cellule du récepteur avec ttl - 1
+      (diffusion multi-sauts au cours de la même étape).
+    """
+
+    def __init__(self, ttl=1, taille_vus=256, rayon=1, taille_cellule=None, renouveler=True):
+        if ttl < 1:
+            raise ValueError(f"ttl invalide : {ttl}")
+        self.ttl = ttl
+        self.renouveler = renouveler
+        self.etape = 0
+        self.taille_vus = taille_vus
+        self.rayon = rayon
+        self.taille_cellule = taille_cellule
+        self.vus = {}  # id véhicule -> OrderedDict des contenus déjà reçus (ordre LRU)
+        self.grille = None
+        self.boites = {}  # cellule -> {cle: (message, ttl restant)} des publications de l'étape
+        self.nb_publications = 0
+        self.nb_doublons = 0
+        self.nb_livraisons = 0  # livraisons à un domaine (cellule)
+        self.nb_receptions = 0  # messages nouveaux pour leur destinataire
+        self.nb_relais = 0
+
+    def ouvrir_etape(self, vehicules):
+        """Répartit les véhicules dans les cellules selon leur position de l'étape."""
+        self.grille = GrilleVoisinage(vehicules, taille_cellule=self.taille_cellule)
+        self.boites = {}
+        self.etape += 1
+
+    def _marquer_vu(self, vehicule, cle):
+        """Ajoute cle aux contenus vus par le véhicule ; False s'il l'avait déjà reçu."""
+        if self.renouveler:
+            cle = (self.etape, cle)
+        vus = self.vus.get(vehicule.id)
+        if vus is None:
+            vus = self.vus[vehicule.id] = OrderedDict()
+        if cle in vus:
+            vus.move_to_end(cle)
+            return False
+        vus[cle] = None
+        if len(vus) > self.taille_vus:
+            vus.popitem(last=False)
+        return True
+
+    def publier(self, vehicule, message, ttl=None):
+        """Dépose un message dans la boîte de la cellule de l'expéditeur."""
+        cle = message.cle
+        ttl = self.ttl if ttl is None else ttl
+        self._marquer_vu(vehicule, cle)
+        self.nb_publications += 1
+        boite = self.boites.setdefault(self.grille._cellule(vehicule.x, vehicule.y), {})
+        deja = boite.get(cle)
+        if deja is None:
+            boite[cle] = (message, ttl)
+        else:
+            self.nb_doublons += 1
+            if ttl > deja[1]:
+                boite[cle] = (deja[0], ttl)
+
+    def distribuer(self):
+        """
+        Livre les boîtes aux domaines voisins, saut par saut, tant que des relais restent à diffuser.
+        Les messages nouveaux sont remis via receive_v2v_message.
+        """
+        boites, self.boites = self.boites, {}
+        rayon = self.rayon
+        cellules = self.grille.cellules
+        while boites:
+            # Domaines concernés : cellules occupées voisines d'au moins une boîte non vide
+            domaines = {}
+            for (bx, by), boite in boites.items():
+                for i in range(bx - rayon, bx + rayon + 1):
+                    for j in range(by - rayon, by + rayon + 1):
+                        if (i, j) not in cellules:
+                            continue
+                        contenu = domaines.setdefault((i, j), {})
+                        for cle, (message, ttl) in boite.items():
+                            deja = contenu.get(cle)
+                            if deja is None or ttl > deja[1]:
+                                contenu[cle] = (message, ttl)
+
+            suivantes = {}
+            for cellule, contenu in domaines.items():
+                self.nb_livraisons += 1
+                for cle, (message, ttl) in contenu.items():
+                    for _, veh in cellules[cellule]:
+                        if not self._marquer_vu(veh, cle):
+                            continue
+                        self.nb_receptions += 1
+                        veh.receive_v2v_message(message.expediteur, message)
+                        if ttl > 1:
+                            relais = suivantes.setdefault(self.grille._cellule(veh.x, veh.y), {})
+                            if cle not in relais:
+                                relais[cle] = (message, ttl - 1)
+                                self.nb_relais += 1
+            boites = suivantes
+
+    def diffuser(self, vehicules):
+        """Étape complète : publication du résumé V2V de chaque véhicule puis distribution."""
+        self.ouvrir_etape(vehicules)
+        for vehicule in vehicules:
+            message = vehicule.resume_v2v()
+            if message is not None:
+                self.publier(vehicule, message)
+        self.distribuer()
+
+# 
+# Moteur de flotte vectorisé (structure de tableaux NumPy)
+# 
+class FlotteVehicules:
+    """
+    Moteur optionnel de déplacement de toute la flotte en une seule mise à jour groupée.
+    Les positions, indices de segment, distances restantes, vitesses et énergies sont
+    stockés dans des tableaux NumPy ; la géométrie est lue dans la table des segments
+    du ReseauRoutier (commun à toute la flotte). Les trajectoires et énergies obtenues
+    sont identiques à celles de Vehicule.deplacer() appelé véhicule par véhicule.
+    """
+
+    def __init__(self, vehicules):
+        self.vehicules = list(vehicules)
+        n = len(self.vehicules)
+        self.reseau = self.vehicules[0].reseau if self.vehicules else RESEAU
+        if any(v.reseau is not self.reseau for v in self.vehicules):
+            raise ValueError("Les véhicules d'une FlotteVehicules doivent partager le même ReseauRoutier")
+        nb_segments_max = max((len(v.segments) for v in self.vehicules), default=1)
+
+        # Itinéraires en identifiants de segment (une ligne par véhicule)
+        self.nb_noeuds = np.array([len(v.itineraire) for v in self.vehicules], dtype=np.int64)
+        self.segments = np.zeros((n, max(nb_segments_max, 1)), dtype=np.int64)
+        for i, v in enumerate(self.vehicules):
+            self.segments[i, :len(v.segments)] = np.frombuffer(v.segments, dtype=np.int32)
+
+        # Paramètres propres à chaque véhicule
+        self.vitesse = np.array([v.vitesse for v in self.vehicules], dtype=float)
+        self.consommation_base = np.array([v.consommation_base for v in self.vehicules], dtype=float)
+
+        # État dynamique
+        self.index_noeud_courant = np.array([v.index_noeud_courant for v in self.vehicules], dtype=np.int64)
+        self.index_noeud_suivant = np.array([v.index_noeud_suivant for v in self.vehicules], dtype=np.int64)
+        self.segment_length = np.array([v.segment_length for v in self.vehicules], dtype=float)
+        self.distance_restante_segment = np.array([v.distance_restante_segment for v in self.vehicules], dtype=float)
+        self.x = np.array([v.x for v in self.vehicules], dtype=float)
+        self.y = np.array([v.y for v in self.vehicules], dtype=float)
+        self.energie = np.array([v.energie for v in self.vehicules], dtype=float)
+
+    def recharger_itineraires(self, rangs):
+        """Relit l'itinéraire (segments et indices) des véhicules de rangs donnés, après une réorientation."""
+        nb_segments_max = max(len(self.vehicules[i].segments) for i in rangs)
+        if nb_segments_max > self.segments.shape[1]:
+            self.segments = np.pad(self.segments, ((0, 0), (0, nb_segments_max - self.segments.shape[1])))
+        for i in rangs:
+            v = self.vehicules[i]
+            self.segments[i, :len(v.segments)] = np.frombuffer(v.segments, dtype=np.int32)
+            self.nb_noeuds[i] = len(v.itineraire)
+            self.index_noeud_courant[i] = v.index_noeud_courant
+            self.index_noeud_suivant[i] = v.index_noeud_suivant
+
+    def _segment_courant(self, idx):
+        return self.segments[idx, self.index_noeud_courant[idx]]
+
+    def _move_on_segment(self, idx, ratio):
+        segment = self._segment_courant(idx)
+        self.x[idx] += ratio * self.reseau.dx[segment]
+        self.y[idx] += ratio * self.reseau.dy[segment]
+
+    def _consommer_energie(self, idx, distance):
+        self.energie[idx] = np.maximum(0, self.energie[idx] - self.consommation_base[idx] * distance)
+
+    def deplacer(self):
+        """
+        Fait avancer toute la flotte d'une étape. Renvoie les indices des véhicules
+        qui se sont déplacés.
+        """
+        idx = np.flatnonzero(self.index_noeud_courant != self.index_noeud_suivant)
+        deplaces = idx
+
+        # La vitesse effective est fixée par la route courante en début d'étape
+        distance_a_parcourir = np.zeros(len(self.vehicules))
+        distance_a_parcourir[idx] = np.minimum(
+            self.vitesse[idx], self.reseau.vitesse_max[self._segment_courant(idx)]
+        )
+
+        while idx.size:
+            distance = distance_a_parcourir[idx]
+            restante = self.distance_restante_segment[idx]
+            partiel = distance < restante
+
+            # Véhicules qui restent sur leur segment
+            ip = idx[partiel]
+            if ip.size:
+                dp = distance[partiel]
+                self._move_on_segment(ip, dp / self.segment_length[ip])
+                self.distance_restante_segment[ip] -= dp
+                self._consommer_energie(ip, dp)
+                distance_a_parcourir[ip] = 0
+
+            # Véhicules qui atteignent le noeud suivant
+            ic = idx[~partiel]
+            if not ic.size:
+                break
+            rc = restante[~partiel]
+            self._move_on_segment(ic, rc / self.segment_length[ic])
+            self._consommer_energie(ic, rc)
+            distance_a_parcourir[ic] -= rc
+            self.distance_restante_segment[ic] = 0
+
+            self.index_noeud_courant[ic] = self.index_noeud_suivant[ic]
+            continue_route = self.index_noeud_suivant[ic] < self.nb_noeuds[ic] - 1
+            suite = ic[continue_route]
+            self.index_noeud_suivant[suite] += 1
+            self.segment_length[suite] = self.reseau.longueur[self._segment_courant(suite)]
+            self.distance_restante_segment[suite] = self.segment_length[suite]
+
+            fin = ic[~continue_route]
+            self.index_noeud_suivant[fin] = self.index_noeud_courant[fin]
+            distance_a_parcourir[fin] = 0
+
+            idx = suite[distance_a_parcourir[suite] > 0]
+
+        return deplaces
+
+    def charger_energie(self):
+        """Relit l'énergie des véhicules (modifiée par les connexions et relais entre deux étapes)."""
+        self.energie = np.fromiter((v.energie for v in self.vehicules), dtype=float, count=len(self.vehicules))
+
+    def appliquer(self, idx):
+        """Recopie l'état des véhicules d'indices idx dans les objets Vehicule."""
+        for i, x, y, energie, courant, suivant, longueur, restante in zip(
+            idx.tolist(),
+            self.x[idx].tolist(),
+            self.y[idx].tolist(),
+            self.energie[idx].tolist(),
+            self.index_noeud_courant[idx].tolist(),
+            self.index_noeud_suivant[idx].tolist(),
+            self.segment_length[idx].tolist(),
+            self.distance_restante_segment[idx].tolist(),
+        ):
+            v = self.vehicules[i]
+            v.x = x
+            v.y = y
+            v.energie = energie
+            v.index_noeud_courant = courant
+            v.index_noeud_suivant = suivant
+            v.segment_length = longueur
+            v.distance_restante_segment = restante
+
+    def avancer(self):
+        """Étape complète : lecture des énergies, déplacement groupé, recopie dans les objets."""
+        self.charger_energie()
+        self.appliquer(self.deplacer())
+
+# 
+# Sorties : console, figures
+# 
+@contextlib.contextmanager
+def _sortie_console(active):
+    """Affiche les messages du logger sur la console le temps d'un appel (mode non headless)."""
+    if not active:
+        yield
+        return
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    niveau = logger.level
+    logger.addHandler(console)
+    logger.setLevel(logging.INFO)
+    try:
+        yield
+    finally:
+        logger.removeHandler(console)
+        logger.setLevel(niveau)
+
+
+def _console_hors_headless(fonction):
+    """
+    Active la sortie console de fonction(..., headless=False) ; rien n'est affiché en mode headless
+    (headless passé par nom ou par position).
+    """
+    signature = inspect.signature(fonction)
+
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        headless = signature.bind_partial(*args, **kwargs).arguments.get("headless", False)
+        with _sortie_console(not headless):
+            return fonction(*args, **kwargs)
+    return enveloppe
+
+
+def _importer_pyplot(headless=False):
+    """
+    Import différé de matplotlib. En mode headless, le backend non interactif (Agg) n'est choisi
+    que si pyplot n'est pas encore importé : le backend d'une application qui utilise déjà pyplot
+    est conservé (les figures y sont enregistrées puis fermées, jamais affichées).
+    """
+    import matplotlib
+    if headless and "matplotlib.pyplot" not in sys.modules:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _montrer_figure(plt, nom, headless, dossier_figures):
+    """Enregistre la figure courante dans dossier_figures, puis l'affiche (ou la ferme en mode headless)."""
+    if dossier_figures is not None and nom is not None:
+        os.makedirs(dossier_figures, exist_ok=True)
+        plt.savefig(os.path.join(dossier_figures, f"{nom}.png"))
+    if headless:
+        plt.close("all")
+    else:
+        plt.show()
+
+# 
+# Enregistrement des trajectoires (animation, rejeu)
+# 
+class EnregistrementTrajectoires:
+    """
+    État des véhicules et des antennes à chaque étape, dans des tableaux NumPy de dtype fixe
+    (une ligne par étape). Avec un dossier, les tableaux sont des fichiers .npy projetés en mémoire :
+    une longue simulation s'enregistre et se rejoue (animer_trajectoires, statistiques) sans être
+    entièrement chargée en RAM. Sans dossier, les tableaux restent en mémoire.
+    """
+    # Bits du champ "drapeaux" des véhicules
+    MALVEILLANT = 1
+    PRIVACY = 2
+    ELECTRIQUE = 4
+
+    DTYPE_VEHICULE = np.dtype([("x", np.float64), ("y", np.float64), ("energie", np.float64), ("drapeaux", np.uint8)])
+    DTYPE_ANTENNE = np.dtype([("x", np.float64), ("y", np.float64), ("disponible", np.bool_), ("congestion", np.int32)])
+    # Compteurs cumulés de la simulation à la fin de chaque étape
+    DTYPE_ETAPE = np.dtype([("succes", np.int64), ("refus", np.int64), ("congestion", np.int64)])
+    FICHIERS = {"vehicules": "vehicules.npy", "antennes": "antennes.npy", "etapes": "etapes.npy"}
+
+    def __init__(self, nb_etapes, nb_vehicules, nb_antennes, dossier=None):
+        self.dossier = dossier
+        formes = {
+            "vehicules": ((nb_etapes, nb_vehicules), self.DTYPE_VEHICULE),
+            "antennes": ((nb_etapes, nb_antennes), self.DTYPE_ANTENNE),
+            "etapes": ((nb_etapes,), self.DTYPE_ETAPE)
+        }
+        if dossier is not None:
+            os.makedirs(dossier, exist_ok=True)
+        for nom, (forme, dtype) in formes.items():
+            if dossier is None:
+                tableau = np.zeros(forme, dtype=dtype)
+            else:
+                tableau = np.lib.format.open_memmap(os.path.join(dossier, self.FICHIERS[nom]), mode="w+",
+                                                    dtype=dtype, shape=forme)
+            setattr(self, nom, tableau)
+
+    @classmethod
+    def ouvrir(cls, dossier, ecriture=False):
+        """Ouvre un enregistrement existant (lecture seule par défaut), sans charger les tableaux."""
+        enregistrement = cls.__new__(cls)
+        enregistrement.dossier = dossier
+        for nom, fichier in cls.FICHIERS.items():
+            setattr(enregistrement, nom, np.load(os.path.join(dossier, fichier), mmap_mode="r+" if ecriture else "r"))
+        return enregistrement
+
+    @property
+    def nb_etapes(self):
+        return self.vehicules.shape[0]
+
+    def enregistrer(self, etape, vehicules, antennes, total_success, total_refused):
+        """
+        Copie l'état courant des véhicules et des antennes dans la ligne `etape` ; la congestion totale
+        est la somme des congestions par antenne enregistrées au même instant.
+        """
+        ligne = self.vehicules[etape]
+        n = len(vehicules)
+        ligne["x"] = np.fromiter((v.x for v in vehicules), dtype=np.float64, count=n)
+        ligne["y"] = np.fromiter((v.y for v in vehicules), dtype=np.float64, count=n)
+        ligne["energie"] = np.fromiter((v.energie for v in vehicules), dtype=np.float64, count=n)
+        ligne["drapeaux"] = np.fromiter(
+            (self.MALVEILLANT * v.is_malicious + self.PRIVACY * v.is_privacy
+             + self.ELECTRIQUE * (v.type_energie == "Electrique") for v in vehicules),
+            dtype=np.uint8, count=n
+        )
+        ligne = self.antennes[etape]
+        n = len(antennes)
+        ligne["x"] = np.fromiter((a.x for a in antennes), dtype=np.float64, count=n)
+        ligne["y"] = np.fromiter((a.y for a in antennes), dtype=np.float64, count=n)
+        ligne["disponible"] = np.fromiter((a.disponible for a in antennes), dtype=np.bool_, count=n)
+        ligne["congestion"] = np.fromiter((a.congestion for a in antennes), dtype=np.int32, count=n)
+        self.etapes[etape] = (total_success, total_refused, int(ligne["congestion"].sum()))
+
+    def statistiques(self, taille_bloc=4096):
+        """DataFrame d'une ligne par étape, calculé par blocs d'étapes (le fichier n'est pas chargé en entier)."""
+        import pandas as pd
+        blocs = []
+        for debut in range(0, self.nb_etapes, taille_bloc):
+            vehicules = self.vehicules[debut:debut + taille_bloc]
+            antennes = self.antennes[debut:debut + taille_bloc]
+            energie = vehicules["energie"]
+            blocs.append(pd.DataFrame({
+                "Etape": np.arange(debut + 1, debut + len(vehicules) + 1),
+                "Energie_moyenne": energie.mean(axis=1) if energie.shape[1] else np.nan,
+                "Vehicules_sans_energie": (energie <= 0).sum(axis=1),
+                "Antennes_disponibles": antennes["disponible"].sum(axis=1),
+                "Antennes_congestionnees": (antennes["congestion"] >= SEUIL_CONGESTION_ROUTE).sum(axis=1),
+                "Connexions_reussies": self.etapes["succes"][debut:debut + taille_bloc],
+                "Connexions_refusees": self.etapes["refus"][debut:debut + taille_bloc],
+                "Congestion_totale": self.etapes["congestion"][debut:debut + taille_bloc]
+            }))
+        if not blocs:
+            return pd.DataFrame()
+        return pd.concat(blocs, ignore_index=True)
+
+    def fermer(self):
+        """Écrit sur disque les pages modifiées (enregistrement projeté en mémoire)."""
+        for nom in self.FICHIERS:
+            tableau = getattr(self, nom)
+            if isinstance(tableau, np.memmap) and tableau.mode != "r":
+                tableau.flush()
+
+    def __getstate__(self):
+        # Enregistrement projeté en mémoire : seul le dossier est sérialisé, les fichiers sont rouverts en écriture
+        if self.dossier is None:
+            return self.__dict__.copy()
+        self.fermer()
+        return {"dossier": self.dossier}
+
+    def __setstate__(self, etat):
+        if "vehicules" not in etat:
+            etat = type(self).ouvrir(etat["dossier"], ecriture=True).__dict__
+        self.__dict__.update(etat)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def animer_trajectoires(enregistrement, headless=False, dossier_figures=None, intervalle=500):
+    """
+    Animation Matplotlib d'un EnregistrementTrajectoires, étape par étape ; chaque image ne lit que
+    sa ligne de l'enregistrement. Affichée, ou enregistrée (animation.gif) dans dossier_figures.
+    """
+    plt = _importer_pyplot(headless)
+    from matplotlib.animation import FuncAnimation
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.set_xlim(0, ZONE_X)
+    ax.set_ylim(0, ZONE_Y)
+    ax.set_title("Simulation Réseaux Véhicules (Avec Types de Routes)")
+
+    scat_antennes = ax.scatter([], [], c='red', marker='^', s=80, label="Antennes")
+    scat_vehicules = ax.scatter([], [], c=[], marker='o', s=50, label="Véhicules")
+
+    # Dessiner le graphe routier avec les types (une ligne par segment de RESEAU)
+    routes_plot = []
+    for (n1, n2), t in zip(RESEAU.routes, RESEAU.types):
+        x1, y1 = INTERSECTIONS[n1]
+        x2, y2 = INTERSECTIONS[n2]
+        # Couleur selon type
+        if t == "autoroute":
+            col = "black"
+            style = "-"
+        elif t == "principale":
+            col = "gray"
+            style = "--"
+        else:  # secondaire
+            col = "lightgray"
+            style = ":"
+        line, = ax.plot([x1, x2], [y1, y2], color=col, linestyle=style, linewidth=2)
+        routes_plot.append(line)
+
+    # 
+    # Initialisation des Statistiques pour la Visualisation
+    # 
+    success_text = ax.text(0.02, 0.95, '', transform=ax.transAxes, fontsize=10,
+                           verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
+    refused_text = ax.text(0.02, 0.90, '', transform=ax.transAxes, fontsize=10,
+                           verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
+    congestion_text = ax.text(0.02, 0.85, '', transform=ax.transAxes, fontsize=10,
+                               verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
+
+    # Segments proches de chaque antenne, calculés une fois (les antennes ne bougent pas)
+    proximite = IndexProximite(enregistrement.antennes[0]["x"], enregistrement.antennes[0]["y"]) \
+        if enregistrement.nb_etapes else None
+
+    # Fonction pour colorier les routes en fonction de la congestion des antennes à l'étape affichée :
+    # seules les routes dont l'état a changé depuis l'image précédente sont recoloriées
+    def color_routes(antennes):
+        precedents = proximite.segments_congestionnes
+        if not proximite.appliquer_congestion(antennes["congestion"]):
+            return
+        for segment in precedents ^ proximite.segments_congestionnes:
+            line = routes_plot[segment]
+            # Colors
+            if segment in proximite.segments_congestionnes:
+                line.set_color('red')
+                line.set_linewidth(3)
+            else:
+                # Recolorier en fonction du type de route
+                route_type = RESEAU.types[segment]
+                if route_type == "autoroute":
+                    line.set_color("black")
+                    line.set_linewidth(2)
+                elif route_type == "principale":
+                    line.set_color("gray")
+                    line.set_linewidth(2)
+                else:
+                    line.set_color("lightgray")
+                    line.set_linewidth(2)
+
+    def init():
+        scat_antennes.set_offsets(np.empty((0, 2)))
+        scat_vehicules.set_offsets(np.empty((0, 2)))
+        scat_vehicules.set_color([])
+        success_text.set_text('')
+        refused_text.set_text('')
+        congestion_text.set_text('')
+        return scat_antennes, scat_vehicules, success_text, refused_text, congestion_text
+
+    def update(frame):
+        antennes = enregistrement.antennes[frame].tolist()
+        vehicules = enregistrement.vehicules[frame]
+        compteurs = enregistrement.etapes[frame]
+        # Antennes
+        scat_antennes.set_offsets([(x, y) for x, y, _, _ in antennes])
+        colors_a = ['red' if not disponible else 'green' for _, _, disponible, _ in antennes]  # Panne: red, disponible: green
+        scat_antennes.set_color(colors_a)
+
+        # Véhicules
+        scat_vehicules.set_offsets(np.column_stack((vehicules["x"], vehicules["y"])))
+        # Définir les couleurs en fonction du type et si malveillant
+        colors_v = []
+        for drapeaux in vehicules["drapeaux"].tolist():
+            if drapeaux & EnregistrementTrajectoires.ELECTRIQUE:
+                base_color = 'green'
+            else:
+                base_color = 'blue'
+            if drapeaux & EnregistrementTrajectoires.MALVEILLANT:  # Malveillant
+                color = 'red'
+            elif drapeaux & EnregistrementTrajectoires.PRIVACY:
+                color = 'cyan'  # Couleur spécifique pour privacy
+            else:
+                color = base_color
+            colors_v.append(color)
+        scat_vehicules.set_color(colors_v)
+
+        # Mise à jour des routes en fonction de la congestion
+        color_routes(enregistrement.antennes[frame])
+
+        # Mise à jour des textes de légende
+        success_text.set_text(f"Connexions Réussies : {compteurs['succes']}")
+        refused_text.set_text(f"Connexions Refusées : {compteurs['refus']}")
+        congestion_text.set_text(f"Congestion Totale Antennes : {compteurs['congestion']}")
+
+        ax.set_title(f"Simulation Step {frame+1}/{enregistrement.nb_etapes}")
+        return scat_antennes, scat_vehicules, success_text, refused_text, congestion_text
+
+    ani = FuncAnimation(
+        fig, update, frames=enregistrement.nb_etapes,
+        init_func=init, blit=False,
+        interval=intervalle, repeat=False
+    )
+
+    ax.legend()
+    if dossier_figures is not None:
+        os.makedirs(dossier_figures, exist_ok=True)
+        ani.save(os.path.join(dossier_figures, "animation.gif"), writer="pillow")
+    if headless:
+        plt.close(fig)
+    else:
+        plt.show()
+    return ani
+
+
+def rejouer_simulation(dossier, headless=False, dossier_figures=None, intervalle=500):
+    """
+    Rejoue une simulation enregistrée par run_simulation(trajectoires=dossier), sans la recalculer :
+    animation (affichée ou enregistrée dans dossier_figures) et statistiques par étape (DataFrame renvoyé).
+    """
+    enregistrement = EnregistrementTrajectoires.ouvrir(dossier)
+    if not headless or dossier_figures is not None:
+        animer_trajectoires(enregistrement, headless=headless, dossier_figures=dossier_figures, intervalle=intervalle)
+    return enregistrement.statistiques()
+
+# 
+# Profilage des phases de l'étape
+# 
+class ProfileurEtapes:
+    """
+    Temps d'horloge et nombre de sections mesurées de chaque phase de chaque étape de run_simulation.
+    Les phases entrelacées (déplacement, connexions, relais et espionnage sont mesurés véhicule par
+    véhicule) sont cumulées par étape. La boucle enchaîne les mesures : noter() renvoie l'instant qui
+    sert de début à la phase suivante, soit une seule lecture d'horloge par section. Sans profileur,
+    run_simulation ne lit jamais l'horloge.
+    Résultats : dataframe() (une ligne par étape et par phase), par_phase() (totaux) ou
+    trace_chrome() (format Trace Event, lisible par chrome://tracing ou Perfetto, une piste par phase).
+    """
+    PHASES = ("antennes", "reroutage", "deplacement", "connexions", "relais", "espionnage", "files",
+              "v2v_envoi", "v2v_reception", "statistiques", "puits", "controle")
+    (ANTENNES, REROUTAGE, DEPLACEMENT, CONNEXIONS, RELAIS, ESPIONNAGE, FILES,
+     V2V_ENVOI, V2V_RECEPTION, STATISTIQUES, PUITS, CONTROLE) = range(len(PHASES))
+
+    def __init__(self, horloge=time.perf_counter_ns):
+        self.horloge = horloge  # horloge en nanosecondes
+        self.etapes = []    # numéro (0-based) de chaque étape profilée
+        self.debuts = []    # début de chaque étape
+        self.fins = []      # fin de la dernière section mesurée de chaque étape
+        self.durees = []    # par étape : durée cumulée de chaque phase (ns)
+        self.appels = []    # par étape : nombre de sections mesurées de chaque phase
+        self.premiers = []  # par étape : début de la première section de chaque phase (-1 : aucune)
+        self._duree = self._appels = self._premier = None
+
+    def debut_etape(self, etape):
+        """Ouvre une étape et renvoie l'instant de début de sa première phase."""
+        n = len(self.PHASES)
+        self._duree, self._appels, self._premier = [0] * n, [0] * n, [-1] * n
+        self.durees.append(self._duree)
+        self.appels.append(self._appels)
+        self.premiers.append(self._premier)
+        self.etapes.append(etape)
+        maintenant = self.horloge()
+        self.debuts.append(maintenant)
+        self.fins.append(maintenant)
+        return maintenant
+
+    def noter(self, phase, debut):
+        """Impute à phase le temps écoulé depuis debut ; renvoie l'instant courant."""
+        maintenant = self.horloge()
+        self._duree[phase] += maintenant - debut
+        self._appels[phase] += 1
+        if self._premier[phase] < 0:
+            self._premier[phase] = debut
+        self.fins[-1] = maintenant
+        return maintenant
+
+    def dataframe(self):
+        """Une ligne par étape et par phase mesurée : Etape (1-based), Phase, Duree_s, Appels."""
+        import pandas as pd
+        durees = np.array(self.durees, dtype=np.int64).reshape(-1, len(self.PHASES))
+        appels = np.array(self.appels, dtype=np.int64).reshape(-1, len(self.PHASES))
+        lignes, phases = np.nonzero(appels)
+        return pd.DataFrame({
+            "Etape": np.array(self.etapes, dtype=np.int64)[lignes] + 1,
+            "Phase": np.array(self.PHASES)[phases],
+            "Duree_s": durees[lignes, phases] / 1e9,
+            "Appels": appels[lignes, phases]
+        })
+
+    def par_phase(self):
+        """Totaux par phase : durée totale, durée moyenne par étape, appels et part du temps mesuré."""
+        df = self.dataframe()
+        resume = df.groupby("Phase", sort=False).agg(Duree_s=("Duree_s", "sum"), Appels=("Appels", "sum"))
+        resume["Duree_par_etape_s"] = resume["Duree_s"] / max(1, len(self.etapes))
+        resume["Part"] = resume["Duree_s"] / resume["Duree_s"].sum() if len(resume) else resume["Duree_s"]
+        return resume.sort_values("Duree_s", ascending=False)
+
+    def trace_chrome(self, chemin=None):
+        """
+        Événements au format Trace Event : une piste par phase (une tranche par étape, de la première
+        section de la phase et de la durée cumulée) et une piste des étapes. Écrit en JSON si chemin est fourni.
+        """
+        origine = self.debuts[0] if self.debuts else 0
+        evenements = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "etapes"}}]
+        evenements += [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": rang + 1, "args": {"name": phase}}
+            for rang, phase in enumerate(self.PHASES)
+        ]
+        for etape, debut, fin, durees, appels, premiers in zip(self.etapes, self.debuts, self.fins,
+                                                               self.durees, self.appels, self.premiers):
+            evenements.append({"name": f"etape {etape + 1}", "ph": "X", "pid": 1, "tid": 0,
+                               "ts": (debut - origine) / 1e3, "dur": (fin - debut) / 1e3})
+            for rang, phase in enumerate(self.PHASES):
+                if appels[rang]:
+                    evenements.append({"name": phase, "ph": "X", "pid": 1, "tid": rang + 1,
+                                       "ts": (premiers[rang] - origine) / 1e3, "dur": durees[rang] / 1e3,
+                                       "args": {"etape": etape + 1, "appels": appels[rang]}})
+        trace = {"traceEvents": evenements, "displayTimeUnit": "ms"}
+        if chemin is not None:
+            import json
+            with open(chemin, "w", encoding="utf-8") as fichier:
+                json.dump(trace, fichier)
+        return trace
+
+# 
+# État de la simulation (points de contrôle, reprise)
+# 
+def _objets_partages():
+    """Objets du module référencés par l'état d'une simulation, sérialisés par leur nom et non par valeur."""
+    objets = {"random": random, "canal": canal, "reseau": RESEAU}
+    objets.update((("antenne", nom), profil) for nom, profil in PROFILS_ANTENNE.items())
+    objets.update((("energie", nom), profil) for nom, profil in PROFILS_ENERGIE.items())
+    return objets
+
+
+class _PicklerEtat(pickle.Pickler):
+    def __init__(self, fichier):
+        super().__init__(fichier, protocol=pickle.HIGHEST_PROTOCOL)
+        self._noms = {id(objet): nom for nom, objet in _objets_partages().items()}
+
+    def persistent_id(self, objet):
+        return self._noms.get(id(objet))
+
+
+class _UnpicklerEtat(pickle.Unpickler):
+    def persistent_load(self, nom):
+        if isinstance(nom, tuple):
+            genre, type_profil = nom
+            return profil_antenne(type_profil) if genre == "antenne" else profil_energie(type_profil)
+        return _objets_partages()[nom]
+
+
+class EtatSimulation:
+    """
+    État complet d'une simulation entre deux étapes : paramètres, générateur aléatoire, antennes,
+    véhicules, journal, structures auxiliaires et statistiques cumulées. run_simulation fait avancer
+    cet état ; etape est l'indice de la prochaine étape à simuler.
+    - sauvegarder() écrit un instantané binaire compressé (pickle + gzip) qui contient aussi la clé et
+      le mode de chiffrement (la clé y est en clair) et l'état du module random s'il sert de générateur ;
+    - charger() relit un instantané et rétablit chiffrement et module random : la simulation reprise
+      (run_simulation(reprise=...)) donne les mêmes résultats que l'exécution ininterrompue ;
+    - copier() bifurque un état en mémoire, pour comparer plusieurs suites après un même préchauffage
+      (le module random, s'il sert de générateur, et un enregistrement de trajectoires sur disque
+      restent partagés).
+    """
+    VERSION = 1
+
+    def __init__(self, parametres, rng, antennes, vehicules, journal, flotte=None, echeancier=None, banque=None,
+                 index_antennes=None, proximite=None, routeur_reroutage=None, bus=None, enregistrement=None):
+        self.parametres = parametres
+        self.rng = rng
+        self.etape = 0
+        self.antennes = antennes
+        self.vehicules = vehicules
+        self.journal = journal
+        self.flotte = flotte
+        self.echeancier = echeancier
+        self.banque = banque
+        self.index_antennes = index_antennes
+        self.proximite = proximite
+        self.routeur_reroutage = routeur_reroutage
+        self.bus = bus
+        self.enregistrement = enregistrement
+
+        # Statistiques cumulées
+        self.total_success = 0
+        self.total_refused = 0
+        self.connection_durations = [] if parametres["historique"] else ResumeDurees()
+        self.vehicles_completed = []
+        self.antenne_pannes = {antenne.id: 0 for antenne in antennes}
+        self.antenne_congestions = {antenne.id: 0 for antenne in antennes}
+        self.total_congestion = 0  # somme de antenne_congestions, tenue à jour par étape
+
+        self.privacy_success = 0
+        self.privacy_refused = 0
+        self.privacy_espionnage = 0
+
+        self.non_privacy_success = 0
+        self.non_privacy_refused = 0
+        self.non_privacy_espionnage = 0
+
+        self.congestion_par_etape = []
+        self.espionnage_par_etape = []
+
+        # Curseur dans le journal : seules les lignes produites depuis l'étape précédente sont comptées
+        self.curseur_journal = 0
+
+        self.connexions_par_antenne = {antenne.id: {"Acceptée": 0, "Refusée": 0, "Panne": 0, "Hors de portée": 0} for antenne in antennes}
+        self.temps_connexion_par_vehicule = {vehicule.pseudonyme: 0.0 for vehicule in vehicules}
+
+        # Curseurs par véhicule pour les interceptions
+        self.curseurs_interceptions = [0] * len(vehicules)
+        self.nb_reroutages = 0
+
+    def sauvegarder(self, chemin):
+        """Écrit l'instantané dans chemin (fichier temporaire puis renommage) et renvoie chemin."""
+        canal.sceller()
+        entete = {
+            "version": self.VERSION,
+            "etape": self.etape,
+            "cle": canal.cle,
+            "mode": canal.mode,
+            "etat_random": random.getstate() if self.rng is random else None
+        }
+        provisoire = f"{chemin}.tmp"
+        with gzip.open(provisoire, "wb", compresslevel=1) as fichier:
+            pickle.dump(entete, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+            _PicklerEtat(fichier).dump(self)
+        os.replace(provisoire, chemin)
+        return chemin
+
+    @classmethod
+    def charger(cls, chemin):
+        """Relit un instantané ; rétablit le chiffrement (clé, mode) et, le cas échéant, l'état du module random."""
+        with gzip.open(chemin, "rb") as fichier:
+            entete = pickle.load(fichier)
+            if entete.get("version") != cls.VERSION:
+                raise ValueError(f"Version d'instantané non prise en charge : {entete.get('version')}")
+            configurer_chiffrement(entete["mode"], cle=entete["cle"])
+            if entete["etat_random"] is not None:
+                random.setstate(entete["etat_random"])
+            return _UnpicklerEtat(fichier).load()
+
+    def copier(self):
+        tampon = io.BytesIO()
+        _PicklerEtat(tampon).dump(self)
+        tampon.seek(0)
+        return _UnpicklerEtat(tampon).load()
 
 # 
 # Fonctions de Simulation
 # 
-def run_simulation(NB_ETAPES=10, show_animation=True):
+def initialiser_simulation(NB_ETAPES=10, nombre_vehicules=15, moteur="objets", voisinage="grille", relais="detaille",
+                           mode_chiffrement="complet", nombre_antennes=6, ratio_malveillants=0.3, ratio_privacy=0.5,
+                           graine=None, cle_chiffrement=None, historique=True, enregistrer=False, trajectoires=None,
+                           routage=None, reroutage=False, antennes_candidates="toutes", k_antennes=3,
+                           cycle_antennes="etapes", ttl_v2v=1):
     """
-    On crée quelques itinéraires possibles pour les véhicules,
-    et on leur attribue un itinéraire.
+    Crée antennes, véhicules et structures auxiliaires d'une simulation et renvoie son EtatSimulation
+    à l'étape 0 (paramètres : voir run_simulation).
+    - historique : False si les enregistrements sont diffusés vers un puits (véhicules sans historique)
+    - enregistrer : True pour conserver l'état de chaque étape (animation) même sans dossier de trajectoires
     """
+    parametres = dict(locals())
+    if moteur not in ("objets", "numpy"):
+        raise ValueError(f"Moteur de déplacement inconnu : {moteur}")
+    if voisinage not in ("grille", "liste", "bus"):
+        raise ValueError(f"Mode de voisinage inconnu : {voisinage}")
+    if relais not in ("detaille", "agrege"):
+        raise ValueError(f"Mode de relais inconnu : {relais}")
+    if antennes_candidates != "toutes" and antennes_candidates not in IndexAntennes.MODES:
+        raise ValueError(f"Sélection d'antennes inconnue : {antennes_candidates}")
+    if cycle_antennes not in ("etapes", "evenements", "vectorise"):
+        raise ValueError(f"Cycle des antennes inconnu : {cycle_antennes}")
+    routeur = Routeur(poids=routage) if routage is not None else None
+    configurer_chiffrement(mode_chiffrement, cle=cle_chiffrement)
+    rng = random.Random(graine) if graine is not None else random
+
     # Liste d'itinéraires possibles (A -> B -> C -> D -> E) on peut changer l'ordre si on souhaite un itinéraire différent
     possible_paths = [
         ["A", "B", "C", "D", "E"],
@@ -561,233 +2917,439 @@ def run_simulation(NB_ETAPES=10, show_animation=True):
     antennes = [
         Antenne(
             id=i,
-            fiabilite=random.randint(3, 6),
-            x=random.randint(0, ZONE_X),
-            y=random.randint(0, ZONE_Y),
+            fiabilite=rng.randint(3, 6),
+            x=rng.randint(0, ZONE_X),
+            y=rng.randint(0, ZONE_Y),
             type_antenne="locale" if i % 2 == 0 else "principale",
-            disponible=True  # Initialement disponibles
+            disponible=True,  # Initialement disponibles
+            rng=rng
         )
-        for i in range(1, 7)
+        for i in range(1, nombre_antennes + 1)
     ]
 
-    # 2) Création des véhicules (avec itinéraire)
-    nombre_vehicules = 15
+    # 2) Création des véhicules (avec itinéraire), toutes les connexions vont dans un journal commun
+    journal = JournalConnexions()
     vehicules = []
     for i in range(1, nombre_vehicules + 1):
-        path = random.choice(possible_paths)
-        is_malicious = (random.random() < 0.3)
-        vitesse_alea = random.uniform(3.0, 7.0)  # vitesse propre du véhicule
+        path = rng.choice(possible_paths) if routeur is None else routeur.itineraire_aleatoire(rng)
+        is_malicious = (rng.random() < ratio_malveillants)
+        vitesse_alea = rng.uniform(3.0, 7.0)  # vitesse propre du véhicule
 
         # Détermination du type d'énergie avec 50% de chances pour chaque type
-        type_energie = random.choices(
+        type_energie = rng.choices(
             ["Electrique", "Thermique"],
             weights=[0.5, 0.5],
             k=1
         )[0]
 
-        # Détermination aléatoire du statut de privacy (50% de chance)
-        is_privacy = random.choice([True, False])
+        # Détermination aléatoire du statut de privacy (tirage d'origine pour le ratio par défaut,
+        # afin qu'une simulation à graine donnée reste reproductible)
+        if ratio_privacy == 0.5:
+            is_privacy = rng.choice([True, False])
+        else:
+            is_privacy = (rng.random() < ratio_privacy)
 
         v = Vehicule(
             id=i,
             itineraire=path,
             vitesse=vitesse_alea,
-            exigence=random.randint(3, 6),
+            exigence=rng.randint(3, 6),
             is_malicious=is_malicious,
             type_energie=type_energie,
-            is_privacy=is_privacy
+            is_privacy=is_privacy,
+            journal=journal,
+            rng=rng,
+            conserver_historique=historique
         )
         vehicules.append(v)
 
-    # 3) Pour l’animation
-    all_positions = []
-
-    # 
-    # Initialisation des Statistiques
-    # 
-    total_success = 0
-    total_refused = 0
-    connection_durations = []
-    vehicles_completed = []
-    antenne_pannes = {antenne.id: 0 for antenne in antennes}
-    antenne_congestions = {antenne.id: 0 for antenne in antennes}
-
-    privacy_success = 0
-    privacy_refused = 0
-    privacy_espionnage = 0
-
-    non_privacy_success = 0
-    non_privacy_refused = 0
-    non_privacy_espionnage = 0
-
-    # **ADDITION : Collecte des données pour les nouveaux graphiques**
-    congestion_par_etape = []
-    espionnage_par_etape = []
-
-    # **ADDITION : Utilisation de DataFrames pour collecter les connexions**
-    connexions_data = {
-        "Vehicule": [],
-        "Type_Energie": [],
-        "Malveillant": [],
-        "Detecte": [],
-        "SuspicionScore": [],
-        "Priorite": [],
-        "Exigence": [],
-        "EnergieInitiale": [],
-        "EnergieRestante": [],
-        "Antenne_ID": [],
-        "Fiabilite_Antenne": [],
-        "Resultat": [],
-        "Distance": [],
-        "Temps": [],
-        "Cout": [],
-        "Message_chiffre": []
-    }
-
-    # **ADDITION : Statistiques additionnelles**
-    connexions_par_antenne = {antenne.id: {"Acceptée": 0, "Refusée": 0, "Panne": 0, "Hors de portée": 0} for antenne in antennes}
-    temps_connexion_par_vehicule = {vehicule.pseudonyme: 0.0 for vehicule in vehicules}
+    flotte = FlotteVehicules(vehicules) if moteur == "numpy" else None
+
+    # Pannes, réparations et fins de congestion planifiées (cycle_antennes="evenements")
+    echeancier = EcheancierAntennes(antennes) if cycle_antennes == "evenements" else None
+    # ou traités en bloc (cycle_antennes="vectorise"), générateur NumPy dérivé du générateur de la simulation
+    banque = BanqueAntennes(antennes, np.random.default_rng(rng.getrandbits(64))) if cycle_antennes == "vectorise" else None
+
+    # Sélection des antennes sollicitées par chaque véhicule et antennes relayables
+    index_antennes = IndexAntennes(antennes)
+
+    # Réorientation autour des routes congestionnées
+    proximite = IndexProximite([a.x for a in antennes], [a.y for a in antennes]) if reroutage else None
+    routeur_reroutage = None
+    if reroutage:
+        routeur_reroutage = routeur if routeur is not None else Routeur(poids="distance")
+
+    # Diffusion V2V par domaine
+    bus = BusV2V(ttl=ttl_v2v) if voisinage == "bus" else None
+
+    # 3) Pour l’animation et le rejeu
+    enregistrement = None
+    if enregistrer or trajectoires is not None:
+        enregistrement = EnregistrementTrajectoires(NB_ETAPES, len(vehicules), len(antennes), dossier=trajectoires)
+
+    return EtatSimulation(parametres, rng, antennes, vehicules, journal, flotte=flotte, echeancier=echeancier,
+                          banque=banque, index_antennes=index_antennes, proximite=proximite,
+                          routeur_reroutage=routeur_reroutage, bus=bus, enregistrement=enregistrement)
+
+@_console_hors_headless
+def run_simulation(NB_ETAPES=10, show_animation=True, nombre_vehicules=15, moteur="objets", voisinage="grille",
+                   relais="detaille", mode_chiffrement="complet", nombre_antennes=6, ratio_malveillants=0.3,
+                   ratio_privacy=0.5, graine=None, cle_chiffrement=None, headless=False, dossier_figures=None,
+                   puits=None, trajectoires=None, routage=None, reroutage=False,
+                   antennes_candidates="toutes", k_antennes=3, cycle_antennes="etapes", ttl_v2v=1,
+                   points_de_controle=None, intervalle_controle=1000, reprise=None, profileur=None):
+    """
+    On crée quelques itinéraires possibles pour les véhicules,
+    et on leur attribue un itinéraire.
+    - nombre_vehicules : taille de la flotte
+    - nombre_antennes : nombre d'antennes
+    - ratio_malveillants, ratio_privacy : proportions de véhicules espions / appliquant la confidentialité
+                                         (ratio_privacy=0.5 garde le tirage d'origine, choice([True, False]))
+    - graine : graine d'un random.Random propre à la simulation (module random global si None)
+    - cle_chiffrement : clé Fernet de la simulation (clé partagée courante si None)
+    - headless : aucune sortie console ni fenêtre ; les messages passent uniquement par le logger
+                 du module et matplotlib n'est pas chargé (sauf si dossier_figures est fourni)
+    - dossier_figures : dossier où enregistrer l'animation (GIF) au lieu de l'afficher
+    - moteur : "objets" (Vehicule.deplacer() véhicule par véhicule) ou
+               "numpy" (FlotteVehicules, déplacement groupé de toute la flotte)
+    - voisinage : "grille" (GrilleVoisinage reconstruite à chaque étape),
+                  "liste" (parcours de tous les véhicules, pour contre-vérification) ou
+                  "bus" (BusV2V : diffusion par cellule, contenus dédupliqués, déjà reçus ignorés)
+    - ttl_v2v : nombre de sauts des messages V2V en mode voisinage="bus"
+    - relais : "detaille" (un enregistrement par destinataire dans connexions_relayees) ou
+               "agrege" (un enregistrement par antenne relayée dans relais_effectues du relais)
+    - mode_chiffrement : "complet", "lot" ou "differe" (voir CanalChiffre)
+    - puits : PuitsEvenements recevant à chaque étape les connexions, relais, interceptions et
+              positions ; les véhicules ne gardent alors pas d'historique et la mémoire reste bornée
+              (df_resultats est vide, connection_durations est un ResumeDurees)
+    - routage : None (itinéraires tirés parmi une liste fixe) ou "distance" / "temps" : itinéraire le
+                plus court (Routeur) entre deux intersections tirées au hasard
+    - reroutage : True pour réorienter en cours de route les véhicules dont la suite d'itinéraire passe
+                  près d'une antenne congestionnée (IndexProximite, chemins alternatifs du Routeur)
+    - antennes_candidates : "toutes" (une demande à chaque antenne, comme à l'origine), "portee"
+                            (antennes disponibles et à portée) ou "proches" (les k_antennes plus proches
+                            d'entre elles) ; les demandes non soumises sont seulement comptées par antenne
+                            (colonnes "Non soumise (...)" de df_connexions_par_antenne)
+    - cycle_antennes : "etapes" (pannes, dégradation et congestion vérifiées pour chaque antenne à
+                       chaque étape), "evenements" (EcheancierAntennes : seules les antennes ayant un
+                       événement dû sont traitées) ou "vectorise" (BanqueAntennes : toutes les antennes
+                       en bloc, générateur NumPy) ; mêmes lois, tirages aléatoires différents
+    - trajectoires : dossier où enregistrer l'état de chaque étape (EnregistrementTrajectoires projeté
+                     en mémoire), à rejouer ensuite avec rejouer_simulation ; sans dossier, l'état n'est
+                     gardé en mémoire que pour l'animation
+    - points_de_controle : dossier où écrire un instantané de l'EtatSimulation (etat_<étape>.ckpt)
+                           toutes les intervalle_controle étapes
+    - reprise : EtatSimulation (modifié en place ; voir EtatSimulation.copier) ou chemin d'un instantané ;
+                la simulation reprend à l'étape suivant le point de contrôle avec les paramètres de
+                l'exécution d'origine (seuls show_animation, headless, dossier_figures, puits et les
+                points de contrôle sont repris de l'appel) ; l'animation n'est produite que si l'état
+                de chaque étape était enregistré depuis le début
+    - profileur : ProfileurEtapes recevant le temps et le nombre d'appels de chaque phase de chaque étape
+    """
+    animer = show_animation and (not headless or dossier_figures is not None)
+    if reprise is None:
+        etat = initialiser_simulation(
+            NB_ETAPES=NB_ETAPES, nombre_vehicules=nombre_vehicules, moteur=moteur, voisinage=voisinage, relais=relais,
+            mode_chiffrement=mode_chiffrement, nombre_antennes=nombre_antennes, ratio_malveillants=ratio_malveillants,
+            ratio_privacy=ratio_privacy, graine=graine, cle_chiffrement=cle_chiffrement, historique=puits is None,
+            enregistrer=animer, trajectoires=trajectoires, routage=routage, reroutage=reroutage,
+            antennes_candidates=antennes_candidates, k_antennes=k_antennes, cycle_antennes=cycle_antennes,
+            ttl_v2v=ttl_v2v
+        )
+    else:
+        etat = reprise if isinstance(reprise, EtatSimulation) else EtatSimulation.charger(reprise)
+    if points_de_controle is not None:
+        os.makedirs(points_de_controle, exist_ok=True)
+
+    # Paramètres de la simulation (ceux de l'exécution d'origine en cas de reprise)
+    parametres = etat.parametres
+    NB_ETAPES = parametres["NB_ETAPES"]
+    voisinage = parametres["voisinage"]
+    relais = parametres["relais"]
+    reroutage = parametres["reroutage"]
+    antennes_candidates = parametres["antennes_candidates"]
+    k_antennes = parametres["k_antennes"]
+
+    rng = etat.rng
+    antennes = etat.antennes
+    vehicules = etat.vehicules
+    journal = etat.journal
+    flotte = etat.flotte
+    echeancier = etat.echeancier
+    banque = etat.banque
+    index_antennes = etat.index_antennes
+    proximite = etat.proximite
+    routeur_reroutage = etat.routeur_reroutage
+    bus = etat.bus
+    enregistrement = etat.enregistrement
+
+    # Statistiques cumulées (les compteurs entiers sont tenus directement dans etat)
+    connection_durations = etat.connection_durations
+    vehicles_completed = etat.vehicles_completed
+    antenne_pannes = etat.antenne_pannes
+    antenne_congestions = etat.antenne_congestions
+    congestion_par_etape = etat.congestion_par_etape
+    espionnage_par_etape = etat.espionnage_par_etape
+    connexions_par_antenne = etat.connexions_par_antenne
+    temps_connexion_par_vehicule = etat.temps_connexion_par_vehicule
+    curseurs_interceptions = etat.curseurs_interceptions
+
+    # Rang de chaque antenne (mises à jour partielles des index avec l'échéancier)
+    rangs_antennes = {antenne.id: rang for rang, antenne in enumerate(antennes)} if echeancier is not None else None
 
     # 4) Boucle de simulation
-    for step in range(NB_ETAPES):
-        print(f"\n--- Étape {step+1} ---")
+    for step in range(etat.etape, NB_ETAPES):
+        if profileur is not None:
+            t = profileur.debut_etape(step)
+        logger.info("\n--- Étape %d ---", step + 1, extra={"etape": step + 1})
         pannes_actuelles = 0  # Compteur pour les pannes actuelles
-        for antenne in antennes:
-            # Vérifier les pannes
-            antenne.verifier_panne()
-            if not antenne.disponible and antenne.panne_duree_restante == antenne.duree_panne_max:
-                antenne_pannes[antenne.id] += 1
-                pannes_actuelles += 1  # Incrementer les pannes actuelles
-            # Mettre à jour la dégradation
-            antenne.mettre_a_jour_degradation()
-            # Mettre à jour la congestion
-            antenne.mettre_a_jour_congestion(step)
-            # Mise à jour des niveaux de congestion pour rapport
-            antenne_congestions[antenne.id] = antenne.congestion
-
-        #Calculer et enregistrer la congestion totale pour cette étape
-        total_congestion = sum(antenne.congestion for antenne in antennes)
-        congestion_par_etape.append(total_congestion)
+        rangs_modifies = None  # antennes à relire dans les index (None : toutes)
+        if banque is not None:
+            for rang in np.flatnonzero(banque.mettre_a_jour(step)).tolist():
+                antenne_pannes[banque.ids[rang]] += 1
+                pannes_actuelles += 1
+            antenne_congestions.update(zip(banque.ids, banque.congestion.tolist()))
+            etat.total_congestion = sum(antenne_congestions.values())
+        elif echeancier is None:
+            for antenne in antennes:
+                # Vérifier les pannes
+                antenne.verifier_panne()
+                if not antenne.disponible and antenne.panne_duree_restante == antenne.duree_panne_max:
+                    antenne_pannes[antenne.id] += 1
+                    pannes_actuelles += 1  # Incrementer les pannes actuelles
+                # Mettre à jour la dégradation
+                antenne.mettre_a_jour_degradation()
+                # Mettre à jour la congestion
+                antenne.mettre_a_jour_congestion(step)
+                # Mise à jour des niveaux de congestion pour rapport
+                antenne_congestions[antenne.id] = antenne.congestion
+            etat.total_congestion = sum(antenne_congestions.values())
+        else:
+            # Seules les antennes ayant un événement dû sont traitées
+            for antenne in echeancier.traiter(step):
+                if antenne.panne_duree_restante == antenne.duree_panne_max:
+                    antenne_pannes[antenne.id] += 1
+                    pannes_actuelles += 1
+            # Total de congestion et index tenus à jour à partir des seules antennes modifiées
+            rangs_modifies = []
+            for antenne in echeancier.extraire_modifiees():
+                etat.total_congestion += antenne.congestion - antenne_congestions[antenne.id]
+                antenne_congestions[antenne.id] = antenne.congestion
+                rangs_modifies.append(rangs_antennes[antenne.id])
+
+        #Enregistrer la congestion totale pour cette étape
+        congestion_par_etape.append(etat.total_congestion)
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.ANTENNES, t)
+
+        # Réorientation (seulement quand l'ensemble des routes congestionnées a changé)
+        if proximite is not None:
+            if proximite.mettre_a_jour(antennes, rangs_modifies):
+                reoriente = [rang for rang, vehicule in enumerate(vehicules) if vehicule.rerouter(proximite, routeur_reroutage)]
+                if reoriente:
+                    etat.nb_reroutages += len(reoriente)
+                    logger.info("%d véhicule(s) réorienté(s) autour des routes congestionnées.", len(reoriente),
+                                extra={"etape": step + 1})
+                    if flotte is not None:
+                        flotte.recharger_itineraires(reoriente)
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.REROUTAGE, t)
 
         #Initialiser le compteur d'espionnage pour cette étape
         espionnage_actuel = 0
 
+        # Événements de l'étape destinés au puits
+        relais_etape = {"Relais_Vehicule": [], "Antenne_ID": [], "Fiabilite_Antenne": [], "Nb_Destinataires": []}
+        interceptions_etape = {"Espion": [], "Espion_Detecte": [], "Victime": [], "Message_chiffre": [],
+                               "Messages_exposes": []}
+
+        # Déplacement groupé de toute la flotte (moteur NumPy)
+        if flotte is not None:
+            flotte.avancer()
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.DEPLACEMENT, t)
+
+        index_antennes.actualiser(rangs_modifies)
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.CONNEXIONS, t)
+
         # Déplacement et soumission des demandes de connexion
-        for vehicule in vehicules:
+        for rang_vehicule, vehicule in enumerate(vehicules):
             # Avance sur l'itinéraire
-            vehicule.deplacer()
+            if flotte is None:
+                vehicule.deplacer()
 
             # Vérifier si le véhicule a terminé son itinéraire
             if vehicule.index_noeud_courant == vehicule.index_noeud_suivant and vehicule.distance_restante_segment == 0:
                 if vehicule.pseudonyme not in vehicles_completed:
                     vehicles_completed.append(vehicule.pseudonyme)
-                    print(f"{vehicule.pseudonyme} a terminé son itinéraire.")
+                    logger.info("%s a terminé son itinéraire.", vehicule.pseudonyme,
+                                extra={"etape": step + 1, "vehicule": vehicule.pseudonyme})
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.DEPLACEMENT, t)
 
             # Soumission des demandes de connexion aux antennes
-            for antenne in antennes:
-                vehicule.essayer_connexion_antenne(antenne, current_step=step)
-
-            # Relais
-            for autre_vehicule in vehicules:
-                if autre_vehicule != vehicule:
-                    for antenne in antennes:
-                        vehicule.relayer_connexion(autre_vehicule, antenne)
+            if antennes_candidates == "toutes":
+                for antenne in antennes:
+                    vehicule.essayer_connexion_antenne(antenne, current_step=step)
+            else:
+                vehicule.soumettre_demandes(index_antennes.selection(vehicule, antennes_candidates, k_antennes),
+                                            len(antennes))
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.CONNEXIONS, t)
+
+            # Relais : antennes relayables calculées une fois, puis distribuées en bloc
+            rangs_relais = vehicule.rangs_relais(index_antennes)
+            antennes_relais = [antennes[rang] for rang in rangs_relais.tolist()]
+            if relais == "agrege":
+                vehicule.relayer_connexions_agregees(len(vehicules) - 1, antennes_relais, step)
+            else:
+                vehicule.relayer_connexions(vehicules, antennes_relais)
+            if puits is not None and len(rangs_relais):
+                # Colonnes du lot "relais" par blocs NumPy (un bloc par véhicule relais)
+                relais_etape["Relais_Vehicule"].append(
+                    np.full(len(rangs_relais), rang_vehicule, dtype=np.int32))
+                relais_etape["Antenne_ID"].append(index_antennes.ids[rangs_relais])
+                relais_etape["Fiabilite_Antenne"].append(index_antennes.fiabilites[rangs_relais])
+                relais_etape["Nb_Destinataires"].append(np.full(len(rangs_relais), len(vehicules) - 1, dtype=np.int64))
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.RELAIS, t)
 
             # Espionnage
             if vehicule.is_malicious and not vehicule.est_detecte:
-                victime = random.choice(vehicules)
+                victime = rng.choice(vehicules)
                 if victime != vehicule:
-                    pre_detection = len(victime.connexions_antennes) + len(victime.connexions_relayees) + len(victime.connexions_interceptees)
-                    vehicule.intercepter_connexion(victime)
-                    post_detection = len(victime.connexions_antennes) + len(victime.connexions_relayees) + len(victime.connexions_interceptees)
-                    if post_detection > pre_detection:
-                        espionnage_actuel += 1
+                    interception = vehicule.intercepter_connexion(victime)
+                    if interception is not None:
+                        espionnage_actuel += interception["Messages_exposes"]
+                        if puits is not None:
+                            interceptions_etape["Espion"].append(vehicule.pseudonyme)
+                            interceptions_etape["Espion_Detecte"].append(vehicule.est_detecte)
+                            interceptions_etape["Victime"].append(interception["Victime"])
+                            interceptions_etape["Message_chiffre"].append(interception["Message_chiffre"])
+                            interceptions_etape["Messages_exposes"].append(interception["Messages_exposes"])
                     victime.suspecter_espion(vehicule.pseudonyme)
+                if profileur is not None:
+                    t = profileur.noter(ProfileurEtapes.ESPIONNAGE, t)
 
         #Enregistrer les espionnages de cette étape pour le graphique
         espionnage_par_etape.append(espionnage_actuel)
 
+        if antennes_candidates != "toutes":
+            index_antennes.cloturer_etape()
+
         # Traitement des files d'attente des antennes après toutes les demandes
         for antenne in antennes:
             antenne.process_connection_queue(step)
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.FILES, t)
 
         # Communication V2V : Envoi de messages
-        for vehicule in vehicules:
-            vehicule.send_v2v_messages(vehicules)
+        if bus is not None:
+            bus.diffuser(vehicules)
+        else:
+            grille = GrilleVoisinage(vehicules) if voisinage == "grille" else None
+            for vehicule in vehicules:
+                vehicule.send_v2v_messages(vehicules, index=grille)
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.V2V_ENVOI, t)
 
         # Communication V2V : Traitement des messages reçus
         for vehicule in vehicules:
             vehicule.process_received_messages()
-
-        # Mise à jour des Statistiques de Connexion
-        for vehicule in vehicules:
-            for c in vehicule.connexions_antennes:
-                # Remplir connexions_data
-                connexions_data["Vehicule"].append(c["Vehicule"])
-                connexions_data["Type_Energie"].append(c["Type_Energie"])
-                connexions_data["Malveillant"].append(c["Malveillant"])
-                connexions_data["Detecte"].append(c["Detecte"])
-                connexions_data["SuspicionScore"].append(c["SuspicionScore"])
-                connexions_data["Priorite"].append(c["Priorite"])
-                connexions_data["Exigence"].append(c["Exigence"])
-                connexions_data["EnergieInitiale"].append(c["EnergieInitiale"])
-                connexions_data["EnergieRestante"].append(c["EnergieRestante"])
-                connexions_data["Antenne_ID"].append(c["Antenne_ID"])
-                connexions_data["Fiabilite_Antenne"].append(c["Fiabilite_Antenne"])
-                connexions_data["Resultat"].append(c["Resultat"])
-                connexions_data["Distance"].append(c["Distance"])
-                connexions_data["Temps"].append(c["Temps"])
-                connexions_data["Cout"].append(c["Cout"])
-                connexions_data["Message_chiffre"].append(c["Message_chiffre"])
-
-                # Mettre à jour les statistiques
-                if c["Resultat"] == "Acceptée":
-                    total_success += 1
-                    connection_durations.append(c["Temps"])
-                    temps_connexion_par_vehicule[vehicule.pseudonyme] += c["Temps"]  #
-                    if vehicule.is_privacy:
-                        privacy_success += 1
-                    else:
-                        non_privacy_success += 1
-                    # Mettre à jour les connexions par antenne
-                    antenne_id = c["Antenne_ID"]
-                    connexions_par_antenne[antenne_id]["Acceptée"] += 1
-                elif "Refus" in c["Resultat"]:
-                    total_refused += 1
-                    connection_durations.append(c["Temps"])
-                    if vehicule.is_privacy:
-                        privacy_refused += 1
-                    else:
-                        non_privacy_refused += 1
-                    # Mettre à jour les connexions par antenne
-                    antenne_id = c["Antenne_ID"]
-                    connexions_par_antenne[antenne_id]["Refusée"] += 1
-                elif c["Resultat"] == "Panne":
-                    antenne_id = c["Antenne_ID"]
-                    connexions_par_antenne[antenne_id]["Panne"] += 1
-                elif c["Resultat"] == "Hors de portée":
-                    antenne_id = c["Antenne_ID"]
-                    connexions_par_antenne[antenne_id]["Hors de portée"] += 1
-
-        # Comptage des espionnages
-        for v in vehicules:
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.V2V_RECEPTION, t)
+
+        # Mise à jour des Statistiques de Connexion (uniquement les lignes de cette étape)
+        debut, fin = etat.curseur_journal, len(journal)
+        etat.curseur_journal = fin
+        resultats = journal.colonne("Resultat", debut, fin)
+        temps = journal.colonne("Temps", debut, fin)
+        privacy = journal.colonne("Privacy", debut, fin)
+        antennes_ids = journal.colonne("Antenne_ID", debut, fin)
+        codes = JournalConnexions.CODES_RESULTAT
+        acceptees = resultats == codes["Acceptée"]
+        refusees = (resultats == codes["Refusée"]) | (resultats == codes["Refus (energie trop faible)"])
+
+        etat.total_success += int(acceptees.sum())
+        etat.total_refused += int(refusees.sum())
+        connection_durations.extend(temps[acceptees | refusees].tolist())
+        etat.privacy_success += int((acceptees & privacy).sum())
+        etat.non_privacy_success += int((acceptees & ~privacy).sum())
+        etat.privacy_refused += int((refusees & privacy).sum())
+        etat.non_privacy_refused += int((refusees & ~privacy).sum())
+
+        codes_vehicules = journal.colonne("Vehicule", debut, fin)
+        for code, duree in zip(codes_vehicules[acceptees].tolist(), temps[acceptees].tolist()):
+            temps_connexion_par_vehicule[journal.pseudonymes[code]] += duree
+
+        # Connexions par antenne
+        for categorie, masque in (
+            ("Acceptée", acceptees),
+            ("Refusée", refusees),
+            ("Panne", resultats == codes["Panne"]),
+            ("Hors de portée", resultats == codes["Hors de portée"])
+        ):
+            ids, nombres = np.unique(antennes_ids[masque], return_counts=True)
+            for antenne_id, nombre in zip(ids.tolist(), nombres.tolist()):
+                connexions_par_antenne[antenne_id][categorie] += nombre
+
+        # Comptage des espionnages (uniquement les nouvelles interceptions)
+        for rang, v in enumerate(vehicules):
+            nouvelles_interceptions = v.nb_interceptions - curseurs_interceptions[rang]
+            curseurs_interceptions[rang] = v.nb_interceptions
             if v.is_privacy:
-                privacy_espionnage += len(v.connexions_interceptees)
+                etat.privacy_espionnage += nouvelles_interceptions
             else:
-                non_privacy_espionnage += len(v.connexions_interceptees)
+                etat.non_privacy_espionnage += nouvelles_interceptions
 
         #Stocke positions et autres données pour l'animation
-        positions_vehicules = [(v.x, v.y, v.is_malicious, v.type_energie, v.energie, v.is_privacy) for v in vehicules]
-        positions_antennes = [(a.x, a.y, a.disponible) for a in antennes]
-        all_positions.append({
-            'vehicules': positions_vehicules,
-            'antennes': positions_antennes
-        })
+        if enregistrement is not None:
+            enregistrement.enregistrer(step, vehicules, antennes, etat.total_success, etat.total_refused)
+        if profileur is not None:
+            t = profileur.noter(ProfileurEtapes.STATISTIQUES, t)
+
+        # Diffusion des événements de l'étape vers le puits, puis oubli
+        if puits is not None:
+            puits.ecrire("connexions", step, journal.lot(), journal.categories)
+            journal.vider()
+            etat.curseur_journal = 0
+            if relais_etape["Antenne_ID"]:
+                puits.ecrire("relais", step, {nom: np.concatenate(blocs) for nom, blocs in relais_etape.items()},
+                             {"Relais_Vehicule": [v.pseudonyme for v in vehicules]})
+            if interceptions_etape["Victime"]:
+                interceptions_etape["Message_chiffre"] = np.array(interceptions_etape["Message_chiffre"], dtype=object)
+                puits.ecrire("interceptions", step, interceptions_etape)
+            puits.ecrire("positions", step, {
+                "Vehicule": np.fromiter((v.id for v in vehicules), dtype=np.int64, count=len(vehicules)),
+                "x": np.fromiter((v.x for v in vehicules), dtype=float, count=len(vehicules)),
+                "y": np.fromiter((v.y for v in vehicules), dtype=float, count=len(vehicules)),
+                "Energie": np.fromiter((v.energie for v in vehicules), dtype=float, count=len(vehicules))
+            })
+            if profileur is not None:
+                t = profileur.noter(ProfileurEtapes.PUITS, t)
+
+        # Point de contrôle
+        etat.etape = step + 1
+        if points_de_controle is not None and etat.etape % intervalle_controle == 0:
+            chemin = etat.sauvegarder(os.path.join(points_de_controle, f"etat_{etat.etape:07d}.ckpt"))
+            logger.info("Point de contrôle écrit : %s", chemin, extra={"etape": step + 1})
+            if profileur is not None:
+                profileur.noter(ProfileurEtapes.CONTROLE, t)
+
+    if reroutage:
+        logger.info("\nRéorientations autour des routes congestionnées : %d", etat.nb_reroutages)
+    if bus is not None:
+        logger.info("\nBus V2V : %d publications (%d doublons), %d livraisons à des cellules, "
+                    "%d messages nouveaux reçus, %d relais", bus.nb_publications, bus.nb_doublons,
+                    bus.nb_livraisons, bus.nb_receptions, bus.nb_relais)
 
     #Création des DataFrames à partir des données collectées
-    df_resultats = pd.DataFrame(connexions_data)
-    print("\n=== Résultats de la simulation ===")
-    print(df_resultats.to_string(index=False))
+    import pandas as pd
+    df_resultats = journal.vers_dataframe()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n=== Résultats de la simulation ===")
+        logger.info(df_resultats.to_string(index=False))
 
     # Espionnage
     espionnage_data = []
@@ -797,11 +3359,25 @@ def run_simulation(NB_ETAPES=10, show_animation=True):
                 espionnage_data.append({
                     "Espion": v.pseudonyme,
                     "Espion_Detecte": v.est_detecte,
-                    "Victime": interception["Victime"]
+                    "Victime": interception["Victime"],
+                    "Messages_exposes": interception["Messages_exposes"]
                 })
     df_espionnage = pd.DataFrame(espionnage_data)
-    print("\n=== Interceptions (espionnage) ===")
-    print(df_espionnage.to_string(index=False))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n=== Interceptions (espionnage) ===")
+        logger.info(df_espionnage.to_string(index=False))
+
+    # Demandes écartées faute de capacité
+    for antenne in antennes:
+        connexions_par_antenne[antenne.id]["Rejet (capacité)"] = antenne.rejets_capacite
+
+    # Demandes non soumises (sélection des antennes candidates)
+    if antennes_candidates != "toutes":
+        for rang, antenne in enumerate(antennes):
+            connexions_par_antenne[antenne.id]["Non soumise (hors de portée)"] = int(index_antennes.hors_portee[rang])
+            connexions_par_antenne[antenne.id]["Non soumise (panne)"] = int(index_antennes.en_panne[rang])
+            if antennes_candidates == "proches":
+                connexions_par_antenne[antenne.id]["Non soumise (élaguée)"] = int(index_antennes.elaguees[rang])
 
     #Création des DataFrames pour les statistiques additionnelles
     df_connexions_par_antenne = pd.DataFrame([
@@ -813,189 +3389,61 @@ def run_simulation(NB_ETAPES=10, show_animation=True):
         for vehicule, temps in temps_connexion_par_vehicule.items()
     ])
 
-    # 5) Animation Matplotlib
-    if show_animation:
-        fig, ax = plt.subplots(figsize=(10, 10))
-        ax.set_xlim(0, ZONE_X)
-        ax.set_ylim(0, ZONE_Y)
-        ax.set_title("Simulation Réseaux Véhicules (Avec Types de Routes)")
-
-        scat_antennes = ax.scatter([], [], c='red', marker='^', s=80, label="Antennes")
-        scat_vehicules = ax.scatter([], [], c=[], marker='o', s=50, label="Véhicules")
-
-        # Dessiner le graphe routier avec les types
-        routes_plot = []
-        for (n1, n2), info in ROUTES.items():
-            x1, y1 = INTERSECTIONS[n1]
-            x2, y2 = INTERSECTIONS[n2]
-            # Couleur selon type
-            t = info["type"]
-            if t == "autoroute":
-                col = "black"
-                style = "-"
-            elif t == "principale":
-                col = "gray"
-                style = "--"
-            else:  # secondaire
-                col = "lightgray"
-                style = ":"
-            line, = ax.plot([x1, x2], [y1, y2], color=col, linestyle=style, linewidth=2)
-            routes_plot.append(line)
-
-        # 
-        # Initialisation des Statistiques pour la Visualisation
-        # 
-        success_text = ax.text(0.02, 0.95, '', transform=ax.transAxes, fontsize=10,
-                               verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
-        refused_text = ax.text(0.02, 0.90, '', transform=ax.transAxes, fontsize=10,
-                               verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
-        congestion_text = ax.text(0.02, 0.85, '', transform=ax.transAxes, fontsize=10,
-                                   verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.5))
-
-        # Fonction pour colorier les routes en fonction de la congestion
-        def color_routes():
-            for route, line in zip(ROUTES.keys(), routes_plot):
-                #
-                # Une route est congestionnée si au moins une antenne proche est congestionnée
-                # 
-                distance_threshold = 10.0
-                congested = False
-                for antenne in antennes:
-                    # Calculer la distance de l'antenne à la route
-                    # Route définie par (n1, n2)
-                    n1, n2 = route
-                    x1, y1 = INTERSECTIONS[n1]
-                    x2, y2 = INTERSECTIONS[n2]
-                    # Calculer la distance point à segment
-                    px, py = antenne.x, antenne.y
-                    seg_len_sq = (x2 - x1)**2 + (y2 - y1)**2
-                    if seg_len_sq == 0:
-                        distance = math.sqrt((px - x1)**2 + (py - y1)**2)
-                    else:
-                        t = max(0, min(1, ((px - x1)*(x2 - x1) + (py - y1)*(y2 - y1)) / seg_len_sq))
-                        proj_x = x1 + t * (x2 - x1)
-                        proj_y = y1 + t * (y2 - y1)
-                        distance = math.sqrt((px - proj_x)**2 + (py - proj_y)**2)
-                    if distance <= distance_threshold and antenne.congestion >= 3:
-                        congested = True
-                        break
-                # Colors
-                if congested:
-                    line.set_color('red')
-                    line.set_linewidth(3)
-                else:
-                    # Recolorier en fonction du type de route
-                    route_type = ROUTES[route]["type"]
-                    if route_type == "autoroute":
-                        line.set_color("black")
-                        line.set_linewidth(2)
-                    elif route_type == "principale":
-                        line.set_color("gray")
-                        line.set_linewidth(2)
-                    else:
-                        line.set_color("lightgray")
-                        line.set_linewidth(2)
-
-        def init():
-            scat_antennes.set_offsets(np.empty((0, 2)))
-            scat_vehicules.set_offsets(np.empty((0, 2)))
-            scat_vehicules.set_color([])
-            success_text.set_text('')
-            refused_text.set_text('')
-            congestion_text.set_text('')
-            return scat_antennes, scat_vehicules, success_text, refused_text, congestion_text
-
-        def update(frame):
-            data_frame = all_positions[frame]
-            # Antennes
-            antennes_xy = [(ant[0], ant[1]) for ant in data_frame['antennes']]
-            scat_antennes.set_offsets(antennes_xy)
-            colors_a = ['red' if not ant[2] else 'green' for ant in data_frame['antennes']]  # Panne: red, disponible: green
-            scat_antennes.set_color(colors_a)
-
-            # Véhicules
-            veh_xy = [(v[0], v[1]) for v in data_frame['vehicules']]
-            scat_vehicules.set_offsets(veh_xy)
-            # Définir les couleurs en fonction du type et si malveillant
-            colors_v = []
-            for v in data_frame['vehicules']:
-                type_energie = v[3]
-                is_malicious = v[2]
-                energie = v[4]
-                is_privacy = v[5]
-                if type_energie == "Electrique":
-                    base_color = 'green'
-                else:
-                    base_color = 'blue'
-                if is_malicious:  # Malveillant
-                    color = 'red'
-                elif is_privacy:
-                    color = 'cyan'  # Couleur spécifique pour privacy
-                else:
-                    color = base_color
-                colors_v.append(color)
-            scat_vehicules.set_color(colors_v)
-
-            # Mise à jour des routes en fonction de la congestion
-            color_routes()
-
-            # Mise à jour des textes de légende
-            success_text.set_text(f"Connexions Réussies : {total_success}")
-            refused_text.set_text(f"Connexions Refusées : {total_refused}")
-            current_congestion = sum(antenne_congestions.values())
-            congestion_text.set_text(f"Congestion Totale Antennes : {current_congestion}")
-
-            ax.set_title(f"Simulation Step {frame+1}/{NB_ETAPES}")
-            return scat_antennes, scat_vehicules, success_text, refused_text, congestion_text
-
-        ani = FuncAnimation(
-            fig, update, frames=len(all_positions),
-            init_func=init, blit=False,
-            interval=500, repeat=False
-        )
-
-        ax.legend()
-        plt.show()
+    # 5) Animation Matplotlib (affichée, ou enregistrée dans dossier_figures en mode headless)
+    if enregistrement is not None:
+        if animer:
+            animer_trajectoires(enregistrement, headless=headless, dossier_figures=dossier_figures)
+        enregistrement.fermer()
 
-    # 7) Coloration des routes après mise à jour
-    color_routes()
-
-    return df_resultats, total_success, total_refused, connection_durations, vehicles_completed, antenne_pannes, antenne_congestions, \
-           privacy_success, privacy_refused, privacy_espionnage, non_privacy_success, non_privacy_refused, non_privacy_espionnage, vehicules, congestion_par_etape, espionnage_par_etape, \
+    return df_resultats, etat.total_success, etat.total_refused, connection_durations, vehicles_completed, antenne_pannes, antenne_congestions, \
+           etat.privacy_success, etat.privacy_refused, etat.privacy_espionnage, etat.non_privacy_success, etat.non_privacy_refused, etat.non_privacy_espionnage, vehicules, congestion_par_etape, espionnage_par_etape, \
            df_connexions_par_antenne, df_temps_connexion_par_vehicule
 
+@_console_hors_headless
 def stats_finales(df_resultats, total_success, total_refused, connection_durations, vehicles_completed, antenne_pannes, antenne_congestions,
                  privacy_success, privacy_refused, privacy_espionnage, non_privacy_success, non_privacy_refused, non_privacy_espionnage, vehicules, congestion_par_etape, espionnage_par_etape,
-                 df_connexions_par_antenne, df_temps_connexion_par_vehicule):
-    """Rapport détaillé en fin de simulation avec comparaison Privacy vs Non-Privacy."""
-    #import matplotlib.pyplot as plt
-    #import seaborn as sns
-
-    print("\n=== Rapport Final de la Simulation ===\n")
+                 df_connexions_par_antenne, df_temps_connexion_par_vehicule, headless=False, dossier_figures=None):
+    """
+    Rapport détaillé en fin de simulation avec comparaison Privacy vs Non-Privacy.
+    En mode headless, les figures ne sont produites que si dossier_figures est fourni
+    (fichiers PNG via le backend non interactif Agg).
+    """
+    logger.info("\n=== Rapport Final de la Simulation ===\n")
 
     # Nombre total de connexions réussies/refusées
-    print(f"Nombre total de connexions réussies : {total_success}")
-    print(f"Nombre total de connexions refusées : {total_refused}\n")
+    logger.info("Nombre total de connexions réussies : %d", total_success, extra={"total_success": total_success})
+    logger.info("Nombre total de connexions refusées : %d\n", total_refused, extra={"total_refused": total_refused})
 
     # Durée moyenne des connexions
     if connection_durations:
-        moyenne_duree = sum(connection_durations) / len(connection_durations)
-        print(f"Durée moyenne des connexions : {moyenne_duree:.2f} unités de temps\n")
+        if isinstance(connection_durations, ResumeDurees):
+            moyenne_duree = connection_durations.moyenne()
+        else:
+            moyenne_duree = sum(connection_durations) / len(connection_durations)
+        logger.info("Durée moyenne des connexions : %.2f unités de temps\n", moyenne_duree,
+                    extra={"duree_moyenne": moyenne_duree})
     else:
-        print("Aucune connexion enregistrée.\n")
+        logger.info("Aucune connexion enregistrée.\n")
 
     # Véhicules ayant terminé leur itinéraire
-    print(f"Véhicules ayant terminé leur itinéraire ({len(vehicles_completed)}):")
+    logger.info("Véhicules ayant terminé leur itinéraire (%d):", len(vehicles_completed))
     for veh in vehicles_completed:
-        print(f" - {veh}")
-    print()
+        logger.info(" - %s", veh, extra={"vehicule": veh})
+    logger.info("")
 
     # État des antennes
-    print("État des antennes:")
+    logger.info("État des antennes:")
     for antenne_id, pannes in antenne_pannes.items():
         congestion = antenne_congestions.get(antenne_id, 0)
-        print(f" - Antenne {antenne_id}: {pannes} panne(s), Congestion actuelle: {congestion}")
-    print()
+        logger.info(" - Antenne %s: %d panne(s), Congestion actuelle: %d", antenne_id, pannes, congestion,
+                    extra={"antenne": antenne_id, "pannes": pannes, "congestion": congestion})
+    logger.info("")
+
+    if headless and dossier_figures is None:
+        return
+
+    plt = _importer_pyplot(headless)
+    import seaborn as sns
 
     # 
     # Visualisation des Statistiques Comparatives
@@ -1034,7 +3482,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     autolabel(rects2)
 
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'connexions_reussies_refusees', headless, dossier_figures)
 
     # 2. Risque d'Espionnage
     labels = ['Privacy', 'Non-Privacy']
@@ -1055,20 +3503,26 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
                      ha='center', va='bottom')
 
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'risque_espionnage', headless, dossier_figures)
 
     # 3. Comparaison des Types d'Énergie
     plt.figure(figsize=(6, 6))
     type_counts_privacy = df_resultats[df_resultats['Vehicule'].isin([v.pseudonyme for v in vehicules if v.is_privacy])]['Type_Energie'].value_counts()
     type_counts_non_privacy = df_resultats[df_resultats['Vehicule'].isin([v.pseudonyme for v in vehicules if not v.is_privacy])]['Type_Energie'].value_counts()
+    # Colonnes catégorielles : ne pas dessiner les types d'énergie absents
+    type_counts_privacy = type_counts_privacy[type_counts_privacy > 0]
+    type_counts_non_privacy = type_counts_non_privacy[type_counts_non_privacy > 0]
 
     fig, axs = plt.subplots(1, 2, figsize=(12, 6))
-    type_counts_privacy.plot(kind='pie', autopct='%1.1f%%', colors=['green', 'blue'], startangle=90, ax=axs[0], title='Types d\'Énergie (Privacy)')
-    type_counts_non_privacy.plot(kind='pie', autopct='%1.1f%%', colors=['green', 'blue'], startangle=90, ax=axs[1], title='Types d\'Énergie (Non-Privacy)')
+    # (df_resultats est vide quand les connexions ont été diffusées vers un puits)
+    if not type_counts_privacy.empty:
+        type_counts_privacy.plot(kind='pie', autopct='%1.1f%%', colors=['green', 'blue'], startangle=90, ax=axs[0], title='Types d\'Énergie (Privacy)')
+    if not type_counts_non_privacy.empty:
+        type_counts_non_privacy.plot(kind='pie', autopct='%1.1f%%', colors=['green', 'blue'], startangle=90, ax=axs[1], title='Types d\'Énergie (Non-Privacy)')
     for ax in axs:
         ax.set_ylabel('')
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'types_energie', headless, dossier_figures)
 
     # 
     # Nouveaux Graphiques pour améliorer la Visualisation
@@ -1084,7 +3538,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     plt.grid(True)
     plt.xticks(steps)  # Assure que chaque étape est marquée sur l'axe x
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'congestion_par_etape', headless, dossier_figures)
 
     # 5. Évolution du Nombre d'Interceptions (Espionnage) au Fil des Étapes de Simulation
     plt.figure(figsize=(10, 6))
@@ -1096,7 +3550,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     plt.grid(True)
     plt.xticks(steps)  # Assure que chaque étape est marquée sur l'axe x
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'espionnage_par_etape', headless, dossier_figures)
 
     # 
     # Graphique 6: Énergie Initiale vs Énergie Restante par Groupe
@@ -1129,7 +3583,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     # plt.title("Énergie Restante par Groupe")
     # plt.ylabel("Énergie Restante")
     # plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, None, headless, dossier_figures)
 
     # 
     # Statistiques Additionnelles
@@ -1144,7 +3598,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     plt.ylabel("Nombre de Connexions")
     plt.legend(title='Résultat')
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'connexions_par_antenne', headless, dossier_figures)
 
     # 7. Temps Total de Connexion par Véhicule
     plt.figure(figsize=(12, 6))
@@ -1161,7 +3615,7 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
     plt.ylabel("Temps Total de Connexion (unités de temps)")
     plt.xticks(rotation=90)
     plt.tight_layout()
-    plt.show()
+    _montrer_figure(plt, 'temps_total_connexion', headless, dossier_figures)
 
     # 8. Temps Moyen de Connexion par Véhicule
     if not df_temps_connexion_par_vehicule.empty:
@@ -1180,9 +3634,87 @@ def stats_finales(df_resultats, total_success, total_refused, connection_duratio
         plt.ylabel("Temps Moyen de Connexion (unités de temps)")
         plt.xticks(rotation=90)
         plt.tight_layout()
-        plt.show()
+        _montrer_figure(plt, 'temps_moyen_connexion', headless, dossier_figures)
+    else:
+        logger.info("Aucune donnée de temps de connexion disponible.")
+
+# 
+# Campagnes Monte-Carlo (réplications parallèles)
+# 
+PARAMETRES_CAMPAGNE = ("nombre_vehicules", "nombre_antennes", "ratio_malveillants", "ratio_privacy", "NB_ETAPES")
+COMPTEURS_CAMPAGNE = (
+    "total_success", "total_refused",
+    "privacy_success", "privacy_refused", "privacy_espionnage",
+    "non_privacy_success", "non_privacy_refused", "non_privacy_espionnage"
+)
+
+
+def executer_replication(parametres, graine, replication=0):
+    """
+    Exécute une réplication avec son propre random.Random et sa propre clé Fernet (dérivés de la graine)
+    et renvoie ses compteurs. Fonction de module pour pouvoir être exécutée dans un processus séparé.
+    """
+    cle = base64.urlsafe_b64encode(random.Random(graine).randbytes(32))
+    resultats = run_simulation(show_animation=False, headless=True, graine=graine, cle_chiffrement=cle, **parametres)
+    (_, total_success, total_refused, _, _, _, _,
+     privacy_success, privacy_refused, privacy_espionnage,
+     non_privacy_success, non_privacy_refused, non_privacy_espionnage, *_) = resultats
+    return {
+        **parametres,
+        "Replication": replication,
+        "Graine": graine,
+        "total_success": total_success,
+        "total_refused": total_refused,
+        "privacy_success": privacy_success,
+        "privacy_refused": privacy_refused,
+        "privacy_espionnage": privacy_espionnage,
+        "non_privacy_success": non_privacy_success,
+        "non_privacy_refused": non_privacy_refused,
+        "non_privacy_espionnage": non_privacy_espionnage
+    }
+
+
+def _executer_tache(tache):
+    return executer_replication(*tache)
+
+
+def executer_campagne(grille, nb_replications=10, graine=0, nb_processus=None, agreger=True):
+    """
+    Balayage Monte-Carlo de run_simulation.
+    - grille : {paramètre: liste de valeurs} parmi PARAMETRES_CAMPAGNE ; toutes les combinaisons sont simulées
+    - nb_replications : réplications par combinaison, chacune avec sa graine (numpy SeedSequence)
+    - nb_processus : taille du pool de processus (1 : exécution dans le processus courant)
+    - agreger : True pour un DataFrame par combinaison (moyenne et écart-type des compteurs),
+                False pour une ligne par réplication
+    """
+    inconnus = set(grille) - set(PARAMETRES_CAMPAGNE)
+    if inconnus:
+        raise ValueError(f"Paramètres de campagne inconnus : {sorted(inconnus)}")
+
+    noms = list(grille)
+    cellules = [dict(zip(noms, valeurs)) for valeurs in itertools.product(*(grille[nom] for nom in noms))]
+    graines = np.random.SeedSequence(graine).spawn(len(cellules) * nb_replications)
+    taches = [
+        (parametres, int(graines[c * nb_replications + r].generate_state(1, np.uint64)[0]), r)
+        for c, parametres in enumerate(cellules)
+        for r in range(nb_replications)
+    ]
+
+    if nb_processus == 1:
+        lignes = [_executer_tache(tache) for tache in taches]
     else:
-        print("Aucune donnée de temps de connexion disponible.")
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=nb_processus) as executeur:
+            lignes = list(executeur.map(_executer_tache, taches, chunksize=max(1, len(taches) // 64)))
+
+    import pandas as pd
+    df = pd.DataFrame(lignes)
+    if not agreger or df.empty:
+        return df
+    agregats = df.groupby(noms)[list(COMPTEURS_CAMPAGNE)].agg(["mean", "std"])
+    agregats.columns = [f"{compteur}_{'moyenne' if stat == 'mean' else 'ecart_type'}" for compteur, stat in agregats.columns]
+    agregats["Replications"] = df.groupby(noms).size()
+    return agregats.reset_index()
 
 # 
 # main
@@ -0,0 +1,420 @@
+"""
+Benchmarks du simulateur (Privacy_Preservation.py).
+
+- Simulations complètes : run_simulation en mode headless sur une grille de nombres de véhicules,
+  d'antennes et d'étapes ; chaque configuration tourne dans un processus neuf et rapporte les étapes
+  par seconde, le pic de mémoire résidente (RSS) et le temps de chaque phase (ProfileurEtapes).
+- Micro-benchmarks des chemins critiques : Vehicule.deplacer, detect_nearby_vehicles,
+  process_connection_with_antenne, Antenne.process_connection_queue et chiffrement Fernet.
+- Temps d'import du module, avec vérification qu'aucune dépendance lourde n'est chargée à l'import.
+
+Utilisation :
+    python benchmarks/bench_simulation.py                        # profil "rapide", comparé à reference.json
+    python benchmarks/bench_simulation.py --profil complet --budget 300 --sortie resultats.json
+    python benchmarks/bench_simulation.py --profil complet --mettre-a-jour-reference
+
+Une configuration qui dépasse --budget secondes (ou --budget-memoire Mo) est interrompue et rapportée
+comme ignorée, sans arrêter les suivantes. Le code de sortie vaut 1 si une mesure régresse de plus
+de --tolerance par rapport à la référence (ou si le budget d'import est dépassé).
+
+Les références dépendent de la machine : reference.json a été produit avec le profil "complet" sur
+une machine de développement à 1 cœur, décrite par son champ "machine" (versions de Python et NumPy,
+plateforme, processeur, nombre de cœurs). Une comparaison faite ailleurs n'est donc pas à conditions
+égales : régénérer la référence avec --mettre-a-jour-reference sur la machine de mesure. Un
+avertissement est affiché pour chaque champ "machine" qui diffère et pour les configurations absentes
+de la référence.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference.json")
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+import numpy as np
+
+import Privacy_Preservation as P
+
+# Réglages de run_simulation : "defaut" (paramètres par défaut) ou "echelle" (moteur NumPy,
+# bus V2V, relais agrégés, antennes les plus proches, cycle vectorisé, chiffrement par lot,
+# puits sans stockage)
+REGLAGES = {
+    "defaut": {},
+    "echelle": dict(moteur="numpy", voisinage="bus", relais="agrege", antennes_candidates="proches",
+                    cycle_antennes="vectorise", mode_chiffrement="lot", puits=True),
+}
+
+# Grilles (réglage, véhicules, antennes, étapes) de chaque profil. Le réglage "defaut" conserve
+# l'historique détaillé des relais (de l'ordre de véhicules² x antennes enregistrements par étape) :
+# au-delà d'une centaine de véhicules, une étape prend plusieurs secondes et des centaines de Mo.
+# Le point 10000 véhicules x 10000 antennes du profil "complet" demande environ 2 minutes et 3,5 Go.
+PROFILS = {
+    "rapide": [
+        ("defaut", [15, 100], [6, 100], [20]),
+        ("echelle", [1000, 10000], [100], [10]),
+    ],
+    "complet": [
+        ("defaut", [15, 50, 100], [6, 100], [20, 100]),
+        ("echelle", [100, 1000], [100, 1000], [10, 100]),
+        ("echelle", [10000], [100, 1000], [10]),
+        ("echelle", [1000, 10000], [10000], [10]),
+        ("echelle", [100000], [100], [10]),
+    ],
+}
+BUDGET_CONFIGURATION_S = 600  # par défaut de --budget
+
+MODULES_LOURDS = ("pandas", "cryptography", "matplotlib", "seaborn", "pyarrow")
+BUDGET_IMPORT_S = 0.5
+
+
+class PuitsNul(P.PuitsEvenements):
+    """Puits qui ignore les enregistrements : mémoire bornée sans coût d'écriture."""
+
+    def ecrire(self, categorie, etape, colonnes, categories=None):
+        pass
+
+
+def pic_rss():
+    """Pic de mémoire résidente du processus en octets (None si la plateforme ne le fournit pas)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic if sys.platform == "darwin" else pic * 1024
+
+
+def cle_configuration(configuration):
+    return "{reglage}:{vehicules}v:{antennes}a:{etapes}e".format(**configuration)
+
+
+# 
+# Simulations complètes
+# 
+def mesurer_simulation(configuration):
+    """Exécute une simulation et renvoie ses mesures."""
+    parametres = dict(REGLAGES[configuration["reglage"]])
+    if parametres.pop("puits", False):
+        parametres["puits"] = PuitsNul()
+    profileur = P.ProfileurEtapes()
+    debut = time.perf_counter()
+    P.run_simulation(NB_ETAPES=configuration["etapes"], nombre_vehicules=configuration["vehicules"],
+                     nombre_antennes=configuration["antennes"], show_animation=False, headless=True,
+                     graine=0, profileur=profileur, **parametres)
+    duree = time.perf_counter() - debut
+    boucle = (profileur.fins[-1] - profileur.debuts[0]) / 1e9 if profileur.etapes else 0.0
+    phases = profileur.par_phase()
+    return {
+        **configuration,
+        "duree_s": duree,
+        "boucle_s": boucle,
+        "etapes_par_s": configuration["etapes"] / boucle if boucle else None,
+        "rss_max_octets": pic_rss(),
+        "phases_s": {phase: float(valeur) for phase, valeur in phases["Duree_s"].items()},
+    }
+
+
+def configurations(profil):
+    for reglage, vehicules, antennes, etapes in PROFILS[profil]:
+        for nb_vehicules in vehicules:
+            for nb_antennes in antennes:
+                for nb_etapes in etapes:
+                    yield {"reglage": reglage, "vehicules": nb_vehicules, "antennes": nb_antennes, "etapes": nb_etapes}
+
+
+def _executer_configuration(configuration, connexion, budget_memoire):
+    """Point d'entrée du processus dédié : envoie les mesures (ou le motif de l'abandon) au parent."""
+    if budget_memoire is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (budget_memoire * 2**20, resource.RLIM_INFINITY))
+    try:
+        connexion.send(mesurer_simulation(configuration))
+    except MemoryError:
+        connexion.send({**configuration, "ignoree": f"budget mémoire de {budget_memoire} Mo dépassé"})
+    finally:
+        connexion.close()
+
+
+def mesurer_dans_processus(configuration, budget=None, budget_memoire=None):
+    """
+    Exécute la configuration dans un processus neuf (le pic de RSS lui est propre). Au-delà de
+    `budget` secondes le processus est arrêté ; la mesure porte alors un champ "ignoree".
+    """
+    contexte = multiprocessing.get_context("spawn")
+    reception, envoi = contexte.Pipe(duplex=False)
+    processus = contexte.Process(target=_executer_configuration, args=(configuration, envoi, budget_memoire))
+    processus.start()
+    envoi.close()
+    if reception.poll(budget):
+        try:
+            mesure = reception.recv()
+        except EOFError:  # processus terminé sans réponse (exception, arrêt par le système...)
+            mesure = None
+        processus.join()
+    else:
+        mesure = {**configuration, "ignoree": f"budget de {budget} s dépassé"}
+        processus.terminate()
+        processus.join()
+    if mesure is None:
+        mesure = {**configuration, "ignoree": f"échec du processus (code de sortie {processus.exitcode})"}
+    return mesure
+
+
+def benchmarks_simulation(profil, budget=None, budget_memoire=None):
+    resultats = []
+    for configuration in configurations(profil):
+        mesure = mesurer_dans_processus(configuration, budget, budget_memoire)
+        resultats.append(mesure)
+        if "ignoree" in mesure:
+            print(f"{cle_configuration(configuration):<32} ignorée : {mesure['ignoree']}", flush=True)
+            continue
+        rss = mesure["rss_max_octets"]
+        print(f"{cle_configuration(configuration):<32} {mesure['etapes_par_s']:>10.2f} étapes/s  "
+              f"{rss / 2**20 if rss else float('nan'):>8.1f} Mo  "
+              f"(phase dominante : {max(mesure['phases_s'], key=mesure['phases_s'].get)})", flush=True)
+    return resultats
+
+
+# 
+# Micro-benchmarks
+# 
+def chronometrer(fonction, preparation=None, repetitions=5):
+    """
+    Meilleur temps (ns) par appel sur `repetitions` essais. fonction(etat) renvoie le nombre d'appels
+    effectués ; preparation() fournit un état neuf à chaque essai, hors chronométrage.
+    """
+    meilleur = None
+    for _ in range(repetitions):
+        etat = preparation() if preparation is not None else None
+        debut = time.perf_counter_ns()
+        appels = fonction(etat)
+        duree = (time.perf_counter_ns() - debut) / appels
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur
+
+
+def _vehicules(nombre, graine=0, journal=None):
+    rng = random.Random(graine)
+    journal = journal if journal is not None else P.JournalConnexions()
+    return [P.Vehicule(i, ["A", "B", "C", "D", "E"], vitesse=rng.uniform(3.0, 7.0), rng=rng, journal=journal)
+            for i in range(nombre)]
+
+
+def _disperser(vehicules, graine=0, etendue=None):
+    """Positions uniformes dans la zone de simulation (ou dans un carré de côté etendue)."""
+    rng = random.Random(graine)
+    largeur, hauteur = (P.ZONE_X, P.ZONE_Y) if etendue is None else (etendue, etendue)
+    for v in vehicules:
+        v.x = rng.uniform(0, largeur)
+        v.y = rng.uniform(0, hauteur)
+    return vehicules
+
+
+def micro_benchmarks(repetitions=5):
+    P.configurer_chiffrement("complet", cle=b"A" * 43 + b"=")
+    mesures = {}
+
+    def deplacer(vehicules):
+        for _ in range(10):
+            for v in vehicules:
+                v.deplacer()
+        return 10 * len(vehicules)
+    mesures["Vehicule.deplacer"] = chronometrer(deplacer, lambda: _vehicules(1000), repetitions)
+
+    # Zone élargie : avec la zone de simulation (100 x 100), tous les véhicules sont voisins
+    vehicules = _disperser(_vehicules(2000), etendue=2000)
+    grille = P.GrilleVoisinage(vehicules)
+
+    def voisins_grille(_):
+        for v in vehicules:
+            v.detect_nearby_vehicles(vehicules, index=grille)
+        return len(vehicules)
+    mesures["detect_nearby_vehicles[grille, 2000]"] = chronometrer(voisins_grille, repetitions=repetitions)
+
+    def voisins_liste(_):
+        for v in vehicules[:200]:
+            v.detect_nearby_vehicles(vehicules)
+        return 200
+    mesures["detect_nearby_vehicles[liste, 2000]"] = chronometrer(voisins_liste, repetitions=repetitions)
+
+    def preparer_connexions():
+        antenne = P.Antenne(1, 5, P.ZONE_X / 2, P.ZONE_Y / 2, rng=random.Random(0))
+        return antenne, _disperser(_vehicules(500))
+
+    def connexions(etat):
+        antenne, vehicules = etat
+        for v in vehicules:
+            v.process_connection_with_antenne(antenne, 0)
+        return len(vehicules)
+    mesures["process_connection_with_antenne"] = chronometrer(connexions, preparer_connexions, repetitions)
+
+    def preparer_file():
+        antenne, vehicules = preparer_connexions()
+        for v in vehicules:
+            antenne.submit_connection_request(v)
+        return antenne
+
+    def file_attente(antenne):
+        antenne.process_connection_queue(0)
+        return 1
+    capacite = P.Antenne.MAX_CONNEXIONS
+    P.Antenne.MAX_CONNEXIONS = 500  # toutes les demandes sont servies
+    try:
+        mesures["Antenne.process_connection_queue[500 demandes]"] = chronometrer(file_attente, preparer_file, repetitions)
+    finally:
+        P.Antenne.MAX_CONNEXIONS = capacite
+
+    message = ("Pseudonyme: ABC123, Priorite: Standard, Resultat: Acceptée, Distance: 123.45, Temps: 1.23, "
+               "Fiabilite: 5, Congestion: 2, Cost: 0.12, EnergieRestante: 87.65")
+
+    def chiffrer(_):
+        for i in range(1000):
+            P.canal.chiffrer(i, message)
+        return 1000
+    mesures["Fernet chiffrement"] = chronometrer(chiffrer, repetitions=repetitions)
+
+    jetons = [P.canal.chiffrer(i, message) for i in range(1000)]
+
+    def dechiffrer(_):
+        for jeton in jetons:
+            P.canal.dechiffrer(jeton)
+        return len(jetons)
+    mesures["Fernet déchiffrement"] = chronometrer(dechiffrer, repetitions=repetitions)
+
+    for nom, ns in mesures.items():
+        print(f"{nom:<48} {ns / 1e3:>10.2f} µs/appel", flush=True)
+    return mesures
+
+
+# 
+# Temps d'import
+# 
+def mesurer_import(repetitions=5):
+    """Meilleur temps d'import du module (processus neuf à chaque essai) et dépendances lourdes chargées."""
+    code = (
+        "import sys, time, json; sys.path.insert(0, {racine!r}); debut = time.perf_counter(); "
+        "import Privacy_Preservation; duree = time.perf_counter() - debut; "
+        "print(json.dumps([duree, [m for m in {lourds!r} if m in sys.modules]]))"
+    ).format(racine=RACINE, lourds=MODULES_LOURDS)
+    durees, charges = [], set()
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        duree, modules = json.loads(sortie)
+        durees.append(duree)
+        charges.update(modules)
+    resultat = {"duree_s": min(durees), "budget_s": BUDGET_IMPORT_S, "modules_lourds": sorted(charges)}
+    print(f"{'import Privacy_Preservation':<48} {resultat['duree_s'] * 1e3:>10.1f} ms "
+          f"(budget {BUDGET_IMPORT_S * 1e3:.0f} ms)", flush=True)
+    return resultat
+
+
+# 
+# Références
+# 
+def machine():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plateforme": platform.platform(),
+        "processeur": platform.processor() or platform.machine(),
+        "nb_coeurs": os.cpu_count(),
+    }
+
+
+def comparer(resultats, reference, tolerance):
+    """Liste des régressions : débit plus faible ou durée plus longue de plus de `tolerance`."""
+    regressions = []
+    anciennes = {cle_configuration(m): m for m in reference.get("simulations", [])}
+    for mesure in resultats["simulations"]:
+        ancienne = anciennes.get(cle_configuration(mesure))
+        if ancienne and ancienne.get("etapes_par_s") and mesure.get("etapes_par_s") is not None:
+            if mesure["etapes_par_s"] < ancienne["etapes_par_s"] * (1 - tolerance):
+                regressions.append(f"{cle_configuration(mesure)} : {mesure['etapes_par_s']:.2f} étapes/s "
+                                   f"(référence {ancienne['etapes_par_s']:.2f})")
+    for nom, ns in resultats["micro"].items():
+        ancien = reference.get("micro", {}).get(nom)
+        if ancien and ns > ancien * (1 + tolerance):
+            regressions.append(f"{nom} : {ns / 1e3:.2f} µs/appel (référence {ancien / 1e3:.2f})")
+    return regressions
+
+
+def avertissements_reference(resultats, reference):
+    """Différences avec la machine qui a produit la référence et configurations sans référence."""
+    avertissements = []
+    machine_reference = reference.get("machine", {})
+    for champ, valeur in resultats["machine"].items():
+        if machine_reference.get(champ) != valeur:
+            avertissements.append(f"machine différente de la référence ({champ} : "
+                                  f"{machine_reference.get(champ)!r}, mesures : {valeur!r})")
+    anciennes = {cle_configuration(m) for m in reference.get("simulations", [])}
+    absentes = [cle_configuration(m) for m in resultats["simulations"] if cle_configuration(m) not in anciennes]
+    if absentes:
+        avertissements.append(f"configurations absentes de la référence (profil {reference.get('profil')!r}) : "
+                              f"{', '.join(absentes)}")
+    return avertissements
+
+
+def main(arguments=None):
+    analyseur = argparse.ArgumentParser(description="Benchmarks du simulateur Privacy_Preservation")
+    analyseur.add_argument("--profil", choices=sorted(PROFILS), default="rapide")
+    analyseur.add_argument("--sortie", help="fichier JSON où écrire les résultats")
+    analyseur.add_argument("--reference", default=REFERENCE, help="résultats de référence (JSON)")
+    analyseur.add_argument("--mettre-a-jour-reference", action="store_true",
+                           help="écrire les résultats dans le fichier de référence au lieu de comparer")
+    analyseur.add_argument("--tolerance", type=float, default=0.3, help="écart relatif toléré (0.3 : 30 %%)")
+    analyseur.add_argument("--repetitions", type=int, default=5, help="essais des micro-benchmarks")
+    analyseur.add_argument("--sans-simulations", action="store_true", help="micro-benchmarks et import seulement")
+    analyseur.add_argument("--budget", type=float, default=BUDGET_CONFIGURATION_S,
+                           help="durée maximale d'une configuration en secondes (au-delà : ignorée)")
+    analyseur.add_argument("--budget-memoire", type=int,
+                           help="mémoire virtuelle maximale d'une configuration en Mo (au-delà : ignorée)")
+    options = analyseur.parse_args(arguments)
+
+    resultats = {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "profil": options.profil,
+        "budget_s": options.budget,
+        "budget_memoire_mo": options.budget_memoire,
+        "machine": machine(),
+        "import": mesurer_import(),
+        "micro": micro_benchmarks(options.repetitions),
+        "simulations": [] if options.sans_simulations else benchmarks_simulation(
+            options.profil, options.budget, options.budget_memoire),
+    }
+    if options.sortie:
+        with open(options.sortie, "w", encoding="utf-8") as fichier:
+            json.dump(resultats, fichier, indent=2, ensure_ascii=False)
+
+    echecs = []
+    if resultats["import"]["duree_s"] > BUDGET_IMPORT_S:
+        echecs.append(f"import : {resultats['import']['duree_s'] * 1e3:.1f} ms > budget {BUDGET_IMPORT_S * 1e3:.0f} ms")
+    if resultats["import"]["modules_lourds"]:
+        echecs.append(f"import : dépendances chargées à l'import : {', '.join(resultats['import']['modules_lourds'])}")
+
+    if options.mettre_a_jour_reference:
+        with open(options.reference, "w", encoding="utf-8") as fichier:
+            json.dump(resultats, fichier, indent=2, ensure_ascii=False)
+        print(f"Référence écrite : {options.reference}")
+    elif os.path.exists(options.reference):
+        with open(options.reference, encoding="utf-8") as fichier:
+            reference = json.load(fichier)
+        for avertissement in avertissements_reference(resultats, reference):
+            print(f"AVERTISSEMENT {avertissement}")
+        echecs += comparer(resultats, reference, options.tolerance)
+
+    for echec in echecs:
+        print(f"RÉGRESSION {echec}")
+    return 1 if echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())